@@ -3,6 +3,9 @@ from __future__ import annotations
 from typing import Dict, List, Optional
 import streamlit as st
 
+# Messages rendered per run; older history is paged in on demand so re-runs stay flat
+HISTORY_WINDOW = 20
+
 
 def init_state() -> None:
     if "messages" not in st.session_state:
@@ -13,11 +16,8 @@ def init_state() -> None:
             }
         ]
 
-    if "pending_user_query" not in st.session_state:
-        st.session_state.pending_user_query = None
-
-    if "busy" not in st.session_state:
-        st.session_state.busy = False
+    if "history_window" not in st.session_state:
+        st.session_state.history_window = HISTORY_WINDOW
 
 
 def header() -> None:
@@ -33,10 +33,22 @@ def header() -> None:
     )
 
 
-def render_chat(messages) -> None:
-    for m in messages:
-        with st.chat_message(m["role"]):
-            st.markdown(m["content"])
+def render_message(role: str, content: str) -> None:
+    with st.chat_message(role):
+        st.markdown(content)
+
+
+def render_chat(messages, window: Optional[int] = None) -> None:
+    window = window or len(messages)
+    hidden = max(0, len(messages) - window)
+
+    if hidden:
+        if st.button(f"Show {min(hidden, HISTORY_WINDOW)} earlier messages", key="show_earlier"):
+            st.session_state.history_window += HISTORY_WINDOW
+            hidden = max(0, hidden - HISTORY_WINDOW)
+
+    for m in messages[hidden:]:
+        render_message(m["role"], m["content"])
 
 
 def push_user_message(text: str) -> None:
@@ -47,8 +59,8 @@ def push_assistant_message(text: str) -> None:
     st.session_state.messages.append({"role": "assistant", "content": text})
 
 
-def chat_input_box(disabled: bool) -> Optional[str]:
-    return st.chat_input("Ask a question about AI in Finance…", disabled=disabled)
+def chat_input_box() -> Optional[str]:
+    return st.chat_input("Ask a question about AI in Finance…")
 
 
 def footer_note() -> None:
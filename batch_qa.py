@@ -0,0 +1,327 @@
+"""High-throughput batch question answering.
+
+Questions are processed in windows. For each window:
+  1) all question embeddings are computed in one call, then vector searches run in parallel,
+  2) every (question, chunk) pair is graded in one bounded-concurrency batch,
+  3) questions with relevant chunks run the graph from GENERATE (hallucination / answer checks
+     and retries included); the rest get the fallback answer.
+
+The stages are pipelined: while one window is being answered, the next one is retrieved and
+graded, and its answers queue up behind the stragglers of the previous window.
+
+Results stream to JSONL as each question finishes; re-running with the same output file skips
+question ids already answered and retries the ones that failed, so an interrupted job resumes
+where it stopped.
+
+    python batch_qa.py questions.jsonl answers.jsonl --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from graph.chains.generate_chain import extract_citation_numbers
+from graph.chunks import ChunkLike, ChunkRef
+from graph.config import config
+from graph.consts import GENERATE, GRADE_DOCUMENTS, RETRIEVE
+from graph.graph_flow import build_workflow
+from graph.llm_gateway import gateway
+from graph.nodes import fallback_node, retrieve_node
+from graph.nodes.grade_documents_node import GradingRun, grade_runs
+from graph.tracing import traced_node, tracer
+from ingestion_retrival import get_retriever, retriever_embeddings
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+
+@dataclass(frozen=True)
+class BatchConfig:
+    concurrency: int = 4  # parallel searches / grader calls / graph runs (also the LLM gateway cap)
+    window_size: int = 32  # questions per pipeline window (bounds memory and checkpoint granularity)
+
+
+@dataclass
+class BatchQuestion:
+    qid: str
+    question: str
+    timings: Dict[str, float] = field(default_factory=dict)
+    documents: List[ChunkRef] = field(default_factory=list)
+
+
+def read_questions(path: Path) -> Iterator[BatchQuestion]:
+    """JSONL with {"id", "question"} per line, or plain text with one question per line."""
+    with path.open(encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                rec = json.loads(line)
+                yield BatchQuestion(qid=str(rec.get("id", n)), question=rec["question"])
+            else:
+                yield BatchQuestion(qid=str(n), question=line)
+
+
+def _read_records(out_path: Path) -> List[Dict[str, Any]]:
+    if not out_path.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    with out_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                rec["id"] = str(rec["id"])
+            except (ValueError, KeyError, TypeError):
+                continue  # a torn last line from a crash is simply redone
+            records.append(rec)
+    return records
+
+
+def completed_ids(out_path: Path) -> Set[str]:
+    """Ids with an answer; failed records (an "error" key) do not count, so they are retried."""
+    return {rec["id"] for rec in _read_records(out_path) if "error" not in rec}
+
+
+def drop_failed_records(out_path: Path) -> int:
+    """Rewrite the results without failed or torn lines, so a retried question ends up with one record."""
+    if not out_path.exists():
+        return 0
+    kept = [rec for rec in _read_records(out_path) if "error" not in rec]
+    dropped = sum(1 for line in out_path.read_text(encoding="utf-8").splitlines() if line.strip()) - len(kept)
+    if dropped:
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        tmp.write_text("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in kept), encoding="utf-8")
+        os.replace(tmp, out_path)
+    return dropped
+
+
+def citations_for(generation: str, documents: List[ChunkLike]) -> List[Dict[str, Any]]:
+    answer = generation.split("\n\n### Sources", 1)[0]
+    out: List[Dict[str, Any]] = []
+    for n in extract_citation_numbers(answer):
+        if 1 <= n <= len(documents):
+            md = documents[n - 1].metadata or {}
+            out.append(
+                {
+                    "n": n,
+                    "source": md.get("source", "unknown"),
+                    "page_start": md.get("page_start", md.get("page")),
+                    "page_end": md.get("page_end", md.get("page_start", md.get("page"))),
+                    "doc_id": md.get("doc_id"),
+                }
+            )
+    return out
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+
+class BatchRunner:
+    def __init__(self, cfg: BatchConfig = BatchConfig()) -> None:
+        self.cfg = cfg
+        self.retriever = get_retriever()
+        self.embeddings = retriever_embeddings(self.retriever)
+        self.answer_app = build_workflow(entry_point=GENERATE).compile()
+        # One pool per stage, so the next window's searches never queue behind this window's answers
+        workers = max(1, cfg.concurrency)
+        self.search_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-search")
+        self.answer_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-answer")
+        self.prepare_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-prepare")
+        self.retrieve = traced_node(RETRIEVE, retrieve_node)
+        self._scope = ExitStack()
+
+        # Let the gateway admit as many concurrent LLM calls as the batch issues, for this run only
+        limits = gateway.limits(config.llm_model)
+        if limits.max_concurrency < cfg.concurrency:
+            self._scope.enter_context(
+                gateway.scoped_limits(config.llm_model, replace(limits, max_concurrency=cfg.concurrency))
+            )
+
+    def close(self) -> None:
+        try:
+            for pool in (self.prepare_pool, self.search_pool, self.answer_pool):
+                pool.shutdown(wait=True)
+        finally:
+            self._scope.close()
+
+    def _retrieve(self, window: List[BatchQuestion]) -> None:
+        t0 = time.perf_counter()
+        vectors = self.embeddings.embed_documents([q.question for q in window])
+        embed_share = (time.perf_counter() - t0) / len(window)
+
+        def search(item) -> float:
+            q, vector = item
+            s0 = time.perf_counter()
+            q.documents = self.retrieve({"question": q.question}, query_embedding=vector)["documents"]
+            return time.perf_counter() - s0
+
+        for q, search_s in zip(window, self.search_pool.map(search, zip(window, vectors))):
+            q.timings["retrieve_s"] = round(embed_share + search_s, 6)
+
+    def _grade(self, window: List[BatchQuestion]) -> float:
+        """Grade the whole window together; returns the window's grading time (shared by its questions)."""
+        t0 = time.perf_counter()
+        runs = [GradingRun(q.question, q.documents) for q in window]
+        with tracer.span(GRADE_DOCUMENTS, kind="stage", questions=len(window)):
+            grade_runs(runs, max_concurrency=self.cfg.concurrency)
+        for q, run in zip(window, runs):
+            q.documents = run.relevant
+        return time.perf_counter() - t0
+
+    def _answer(self, q: BatchQuestion) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        if q.documents:
+            state = self.answer_app.invoke({"question": q.question, "documents": q.documents, "document_relevancy": True})
+        else:
+            state = fallback_node({"question": q.question, "documents": []})
+        q.timings["generate_s"] = round(time.perf_counter() - t0, 6)
+
+        generation = str(state.get("generation", ""))
+        documents = state.get("documents", []) or []
+        return {
+            "id": q.qid,
+            "question": q.question,
+            "answer": generation,
+            "citations": citations_for(generation, documents),
+            "relevant_chunks": len(q.documents),
+            "retries": state.get("retries", 0),
+            "timings": q.timings,
+        }
+
+    def _prepare(self, window: List[BatchQuestion]) -> Dict[str, float]:
+        """Stages 1-2 for one window; returns when it started and its grading time."""
+        started = time.perf_counter()
+        self._retrieve(window)
+        return {"started": started, "grade_s": self._grade(window)}
+
+    def _finish(self, q: BatchQuestion, started: float, emit: Callable[[Dict[str, Any]], None]) -> None:
+        try:
+            record = self._answer(q)
+        except Exception as e:
+            record = {"id": q.qid, "question": q.question, "error": repr(e), "timings": q.timings}
+        record["timings"]["latency_s"] = round(time.perf_counter() - started, 6)
+        emit(record)
+
+    def run(
+        self,
+        windows: List[List[BatchQuestion]],
+        emit: Callable[[Dict[str, Any]], None],
+        checkpoint: Callable[[], None] = lambda: None,
+    ) -> List[Dict[str, Any]]:
+        """Answer every window, preparing window i+1 while window i is answered; returns per-window stats.
+
+        At most two windows are in the answer stage at once; `checkpoint` runs as each one drains.
+        """
+        stats: List[Dict[str, Any]] = []
+        answering: Deque[Tuple[List[BatchQuestion], Dict[str, float], List[Future]]] = deque()
+
+        def drain() -> None:
+            window, prep, futures = answering.popleft()
+            wait(futures)
+            for f in futures:
+                f.result()  # surface emit failures
+            checkpoint()
+            stats.append(
+                {
+                    "questions": len(window),
+                    "grade_s": round(prep["grade_s"], 6),
+                    "elapsed_s": round(time.perf_counter() - prep["started"], 6),
+                }
+            )
+
+        prepared = self.prepare_pool.submit(self._prepare, windows[0]) if windows else None
+        for i, window in enumerate(windows):
+            prep = prepared.result()
+            if i + 1 < len(windows):
+                prepared = self.prepare_pool.submit(self._prepare, windows[i + 1])
+            futures = [self.answer_pool.submit(self._finish, q, prep["started"], emit) for q in window]
+            answering.append((window, prep, futures))
+            while len(answering) > 1:
+                drain()
+        while answering:
+            drain()
+        return stats
+
+
+def run_batch(
+    questions_path: Path,
+    out_path: Path,
+    cfg: BatchConfig = BatchConfig(),
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    done = completed_ids(out_path)
+    retried = drop_failed_records(out_path)
+    pending = [q for q in read_questions(questions_path) if q.qid not in done]
+    if limit is not None:
+        pending = pending[:limit]
+
+    lock = threading.Lock()
+    written = 0
+    errors = 0
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    runner = BatchRunner(cfg)
+    t0 = time.perf_counter()
+
+    try:
+        with out_path.open("a", encoding="utf-8") as out:
+
+            def emit(record: Dict[str, Any]) -> None:
+                nonlocal written, errors
+                with lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    written += 1
+                    errors += "error" in record
+
+            # Window boundary = durable checkpoint
+            windows = runner.run(
+                [pending[start:start + cfg.window_size] for start in range(0, len(pending), cfg.window_size)],
+                emit,
+                checkpoint=lambda: os.fsync(out.fileno()),
+            )
+        gateway_metrics = gateway.metrics()
+    finally:
+        runner.close()
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "skipped_already_done": len(done),
+        "retried_failed": retried,
+        "answered": written,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "questions_per_s": round(written / elapsed, 3) if elapsed else 0.0,
+        # Grading runs once per window for all of its questions, so it is reported per window
+        "windows": windows,
+        "llm_gateway": gateway_metrics,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a file of questions through the RAG graph")
+    parser.add_argument("questions", type=Path, help="JSONL ({'id', 'question'}) or one question per line")
+    parser.add_argument("out", type=Path, help="streaming JSONL results (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=BatchConfig.concurrency)
+    parser.add_argument("--window-size", type=int, default=BatchConfig.window_size)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = run_batch(
+        args.questions,
+        args.out,
+        BatchConfig(concurrency=args.concurrency, window_size=args.window_size),
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,146 @@
+"""Micro-benchmark: page cleaning engine (text_cleaning) vs the legacy multi-pass functions.
+
+    python -m benchmarks.cleaning --docs 200 --pages 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from text_cleaning import clean_pages, clear_normalize_cache
+
+WINDOW, MIN_LEN, RATIO = 3, 8, 0.6  # IngestionConfig defaults
+
+
+# -----------------------------
+# Legacy Implementation (reference for parity and timing)
+# -----------------------------
+
+def legacy_normalize_text(text: str) -> str:
+    text = text.replace("\u00ad", "")
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    return text.strip()
+
+
+def legacy_collect_repeated_lines(pages: List[str], window: int, min_len: int, ratio: float) -> set[str]:
+    candidates: List[str] = []
+    for t in pages:
+        lines = [ln.strip() for ln in t.splitlines()]
+        candidates.extend(ln for ln in lines[:window] if len(ln) >= min_len)
+        candidates.extend(ln for ln in lines[-window:] if len(ln) >= min_len)
+    counts = Counter(candidates)
+    threshold = max(2, int(len(pages) * ratio))
+    return {ln for ln, c in counts.items() if c >= threshold}
+
+
+def legacy_strip_repeated_lines(page_text: str, repeated: set[str]) -> str:
+    out: List[str] = []
+    for ln in page_text.splitlines():
+        s = ln.strip()
+        if s and s in repeated:
+            continue
+        out.append(ln)
+    return "\n".join(out)
+
+
+def legacy_clean_pages(pages: List[str], window: int, min_len: int, ratio: float) -> List[str]:
+    repeated = legacy_collect_repeated_lines(pages, window, min_len, ratio) if len(pages) >= 3 else set()
+    out = []
+    for text in pages:
+        if repeated:
+            text = legacy_strip_repeated_lines(text, repeated)
+        out.append(legacy_normalize_text(text))
+    return out
+
+
+# -----------------------------
+# Synthetic OCR-style Pages
+# -----------------------------
+
+WORDS = ["capital", "liquidity", "model", "exposure", "regulatory", "portfolio", "inter", "national",
+         "risk", "credit", "market", "forecast", "quarterly", "reporting", "algorithmic", "trading"]
+
+
+def ocr_document(rng: random.Random, n_pages: int, doc_no: int) -> List[str]:
+    pages = []
+    for p in range(n_pages):
+        lines = [f"ACME Bank Annual Report {2020 + doc_no % 5}", "Confidential  —  internal use", ""]
+        for _ in range(rng.randint(25, 45)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+            line = " ".join(words)
+            roll = rng.random()
+            if roll < 0.15:
+                line += "-"  # hyphenated line break
+            elif roll < 0.3:
+                line += " " * rng.randint(1, 4)  # trailing OCR spaces
+            elif roll < 0.4:
+                line = line.replace(" ", "   ", 2)
+            elif roll < 0.45:
+                line = line.replace("a", "a\u00ad", 1)
+            lines.append(line)
+            if rng.random() < 0.1:
+                lines.extend([""] * rng.randint(1, 3))
+        lines += ["", f"Page {p + 1}", "ACME Bank — all rights reserved"]
+        pages.append("\n".join(lines))
+    return pages
+
+
+def _time(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    docs = [ocr_document(rng, args.pages, i) for i in range(args.docs)]
+    n_pages = sum(len(d) for d in docs)
+
+    legacy = [legacy_clean_pages(d, WINDOW, MIN_LEN, RATIO) for d in docs]
+    engine = [clean_pages(d, WINDOW, MIN_LEN, RATIO) for d in docs]
+    assert legacy == engine, "cleaning engine output differs from the legacy functions"
+
+    def engine_cold() -> None:
+        clear_normalize_cache()
+        for d in docs:
+            clean_pages(d, WINDOW, MIN_LEN, RATIO)
+
+    legacy_s = _time(lambda: [legacy_clean_pages(d, WINDOW, MIN_LEN, RATIO) for d in docs], args.repeats)
+    cold_s = _time(engine_cold, args.repeats)
+    warm_s = _time(lambda: [clean_pages(d, WINDOW, MIN_LEN, RATIO) for d in docs], args.repeats)
+
+    return {
+        "pages": n_pages,
+        "chars": sum(len(p) for d in docs for p in d),
+        "legacy_pages_per_s": round(n_pages / legacy_s, 1),
+        "engine_cold_pages_per_s": round(n_pages / cold_s, 1),
+        "engine_warm_pages_per_s": round(n_pages / warm_s, 1),
+        "speedup_cold": round(legacy_s / cold_s, 2),
+        "speedup_warm": round(legacy_s / warm_s, 2),
+        "parity": True,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark page cleaning against the legacy implementation")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import random
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+TOPICS = [
+    ("credit scoring", "gradient boosted models estimate default probability from repayment history"),
+    ("fraud detection", "anomaly detectors flag card transactions that deviate from a customer's profile"),
+    ("algorithmic trading", "reinforcement learning agents rebalance portfolios under transaction costs"),
+    ("anti money laundering", "graph analytics trace layered transfers between shell accounts"),
+    ("robo advisory", "questionnaires map client risk tolerance onto model portfolios"),
+    ("insurance underwriting", "telematics features price motor policies by driving behaviour"),
+    ("regulatory reporting", "language models extract obligations from supervisory guidance"),
+    ("market sentiment", "transformer classifiers score earnings call transcripts for tone"),
+    ("liquidity forecasting", "temporal networks predict intraday cash positions for treasury desks"),
+    ("loan origination", "document understanding pipelines verify income statements automatically"),
+]
+
+ENTITIES = [
+    "Aldermoor", "Brightwell", "Calloway", "Dunmere", "Everhart", "Fairbourne", "Glenholt",
+    "Harrowgate", "Ivesdale", "Junipero", "Kestrelton", "Larkspur", "Merriden", "Northvale",
+]
+
+FILLER = [
+    "The study reports results on a held-out sample collected over several reporting periods.",
+    "Model governance teams reviewed validation evidence before deployment.",
+    "Feature drift was monitored monthly and retraining was triggered by threshold breaches.",
+    "Explainability reports were shared with compliance and business stakeholders.",
+    "Latency budgets constrained the choice of architecture in production.",
+    "Data lineage was documented to satisfy audit requirements.",
+]
+
+OFF_TOPIC_QUESTIONS = [
+    "How do you make pizza like Tony Soprano?",
+    "What is the best season to plant tulips?",
+]
+
+
+@dataclass(frozen=True)
+class SyntheticQuestion:
+    question: str
+    doc_name: str
+    expect_answer: bool
+
+
+TOPICAL = [
+    "At {entity}, {topic} relies on the following approach: {fact}.",
+    "The {entity} {topic} team reports that the approach reduced manual review effort.",
+    "{entity} evaluated {topic} models against a rules-based benchmark before rollout.",
+    "Risk officers at {entity} monitor {topic} outcomes with monthly dashboards.",
+]
+
+
+def _page_text(rng: random.Random, entity: str, topic: str, fact: str, page: int) -> str:
+    lines = [f"{entity} Research Quarterly", ""]
+    for template in TOPICAL:
+        lines.append(template.format(entity=entity, topic=topic, fact=fact))
+        lines.append(rng.choice(FILLER))
+    if page == 0:
+        lines.append(f"In summary, {entity} applies AI to {topic} across its business lines.")
+    lines += ["", f"Confidential - page {page + 1}"]
+    return "\n".join(lines)
+
+
+def _pdf_string(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(path: Path, pages: List[str]) -> None:
+    """Minimal text-only PDF (A4, Helvetica 9pt), so the corpus needs no PDF-writing dependency."""
+    n = len(pages)
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a (page, content stream) pair per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + " ".join(f"{4 + 2 * i} 0 R" for i in range(n)).encode() + b"] /Count %d >>" % n,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, text in enumerate(pages):
+        lines = [line for para in text.split("\n") for line in textwrap.wrap(para, 95) or [""]]
+        ops = ["BT", "/F1 9 Tf", "12 TL", "48 786 Td"] + [f"({_pdf_string(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >>"
+            b" /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def build_corpus(out_dir: Path, n_docs: int = 20, pages_per_doc: int = 4, seed: int = 7) -> List[SyntheticQuestion]:
+    """Write `n_docs` synthetic finance PDFs into `out_dir` and return questions about them."""
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    questions: List[SyntheticQuestion] = []
+    for i in range(n_docs):
+        topic, fact = TOPICS[i % len(TOPICS)]
+        entity = f"{ENTITIES[i % len(ENTITIES)]}{i // len(ENTITIES) or ''}"
+        name = f"report_{i:04d}.pdf"
+        pages = [_page_text(rng, entity, topic, fact, p) for p in range(pages_per_doc)]
+        _write_pdf(out_dir / name, pages)
+        questions.append(SyntheticQuestion(f"How does {entity} use AI for {topic}?", name, True))
+
+    questions += [SyntheticQuestion(q, "", False) for q in OFF_TOPIC_QUESTIONS]
+    return questions
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+import time
+import zlib
+from typing import Any, List, Optional, Sequence, Type
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from graph.llm_gateway import ModelFactory, ModelLimits
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "about", "does", "from", "have", "into", "over", "that", "their", "there", "these",
+    "this", "what", "when", "where", "which", "with", "would", "used", "using", "much", "many",
+}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _words(text) if len(w) >= 4 and w not in _STOPWORDS]
+
+
+# -----------------------------
+# Fake Embeddings
+# -----------------------------
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words embeddings (stable across processes)."""
+
+    def __init__(self, dim: int = 256, latency_s: float = 0.0, per_text_latency_s: float = 0.0) -> None:
+        self.dim = dim
+        self.latency_s = latency_s
+        self.per_text_latency_s = per_text_latency_s
+        self.calls = 0
+        self.texts = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for w in _words(text):
+            if len(w) < 3 or w in _STOPWORDS:
+                continue
+            h = zlib.crc32(w.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm == 0:
+            vec[0] = 1.0
+            return vec
+        return [v / norm for v in vec]
+
+    def _sleep(self, n: int) -> None:
+        self.calls += 1
+        self.texts += n
+        delay = self.latency_s + self.per_text_latency_s * n
+        if delay > 0:
+            time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._sleep(len(texts))
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._sleep(1)
+        return self._embed(text)
+
+
+# -----------------------------
+# Fake Chat Model
+# -----------------------------
+
+def _message_text(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _human_text(messages: Sequence[BaseMessage]) -> str:
+    human = [str(m.content) for m in messages if m.type == "human"]
+    return human[-1] if human else _message_text(messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic stand-in for the Ollama chat model.
+
+    - Plain calls answer with the first sentence of source [1] (or the don't-know string).
+    - Structured calls fill `binary_score`: document relevance is keyword overlap between the
+      question and the document; hallucination / answer checks always pass.
+    """
+
+    latency_s: float = 0.0
+    structured_latency_s: Optional[float] = None
+    relevance_threshold: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer(self, prompt: str) -> str:
+        m = re.search(r"\[1\]\s+(.+?[.!?])(\s|$)", prompt, flags=re.S)
+        if not m:
+            return "I don't know based on the provided sources."
+        return f"{' '.join(m.group(1).split())} [1]"
+
+    def _relevant(self, prompt: str) -> bool:
+        if "User question:" not in prompt:
+            return True
+        document, question = prompt.rsplit("User question:", 1)
+        terms = set(_content_words(question))
+        if not terms:
+            return False
+        doc_words = set(_words(document))
+        return len(terms & doc_words) / len(terms) >= self.relevance_threshold
+
+    def _structured(self, schema_name: str, field_type: str, prompt: str) -> str:
+        verdict = self._relevant(prompt) if schema_name == "GradeDocuments" else True
+        value: Any = ("yes" if verdict else "no") if field_type == "str" else verdict
+        return json.dumps({"binary_score": value})
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        schema_name = kwargs.get("fake_schema")
+        delay = self.latency_s
+        if schema_name and self.structured_latency_s is not None:
+            delay = self.structured_latency_s
+        if delay > 0:
+            time.sleep(delay)
+
+        if schema_name:
+            content = self._structured(schema_name, kwargs.get("fake_field_type", "str"), _human_text(messages))
+        else:
+            content = self._answer(_human_text(messages))
+
+        prompt_tokens = len(_words(_message_text(messages)))
+        completion_tokens = len(_words(content))
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> Runnable:  # type: ignore[override]
+        annotation = schema.model_fields["binary_score"].annotation
+        field_type = "bool" if annotation is bool else "str"
+        bound = self.bind(fake_schema=schema.__name__, fake_field_type=field_type)
+        return bound | RunnableLambda(lambda msg: schema.model_validate_json(msg.content))
+
+
+def fake_model_factory(latency_s: float = 0.0, structured_latency_s: Optional[float] = None) -> ModelFactory:
+    """Gateway model factory returning FakeChatModel with the given latencies."""
+
+    def factory(model: str, temperature: float, limits: ModelLimits) -> BaseChatModel:
+        return FakeChatModel(latency_s=latency_s, structured_latency_s=structured_latency_s)
+
+    return factory
+
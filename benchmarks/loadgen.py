@@ -0,0 +1,260 @@
+"""Replay a JSONL question log against the compiled graph.
+
+Each log line is a JSON object: {"question": "...", "think_time_s": 1.5, "offset_s": 12.0}
+(`think_time_s` / `offset_s` are optional and only used with --think-times / --use-offsets).
+
+    # open loop at 4 questions/s against the in-process stub Ollama server
+    python -m benchmarks.loadgen questions.jsonl --backend stub --qps 4 --duration 60
+    # closed loop with 8 concurrent users replaying recorded think-times
+    python -m benchmarks.loadgen questions.jsonl --backend stub --concurrency 8 --think-times
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.run import FALLBACK_PREFIX, percentiles, resolve_token_counter
+
+
+@dataclass(frozen=True)
+class LogEntry:
+    question: str
+    think_time_s: float = 0.0
+    offset_s: Optional[float] = None
+
+
+@dataclass
+class Result:
+    question: str
+    latency_s: float
+    service_s: float
+    ok: bool
+    fallback: bool
+    nodes: Dict[str, float]
+    llm_calls: int
+    error: Optional[str] = None
+
+
+def load_log(path: Path) -> List[LogEntry]:
+    entries: List[LogEntry] = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            entries.append(
+                LogEntry(
+                    question=rec["question"],
+                    think_time_s=float(rec.get("think_time_s", 0.0) or 0.0),
+                    offset_s=rec.get("offset_s"),
+                )
+            )
+    if not entries:
+        raise ValueError(f"No questions found in {path}")
+    return entries
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+def setup_backend(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    """Point the graph at the chosen backend; returns a description for the report."""
+    from graph.llm_gateway import gateway
+    from ingestion_retrival import build_retriever, set_retriever
+
+    if args.backend == "live":
+        return {"backend": "live", "ollama_host": os.getenv("OLLAMA_HOST", "default")}
+
+    from benchmarks.corpus import build_corpus
+    from ingestion import IngestionConfig, ingest
+
+    cfg = IngestionConfig(
+        dataset_dir=workdir / "Dataset",
+        persist_directory=workdir / ".chroma",
+        collection_name="rag-loadgen",
+        manifest_path=workdir / "ingestion_manifest.json",
+        token_counter=resolve_token_counter("auto"),
+    )
+    build_corpus(cfg.dataset_dir, n_docs=args.corpus_docs)
+
+    if args.backend == "fake":
+        from benchmarks.fakes import FakeEmbeddings, fake_model_factory
+
+        embeddings = FakeEmbeddings(latency_s=args.embed_latency)
+        gateway.set_model_factory(fake_model_factory(args.llm_latency, args.grade_latency))
+        ingest(cfg, embeddings=embeddings)
+        set_retriever(build_retriever(str(cfg.persist_directory), cfg.collection_name, embeddings))
+        return {"backend": "fake"}
+
+    # stub: real Ollama HTTP clients against the in-process stub server
+    from langchain_ollama import OllamaEmbeddings
+
+    from benchmarks.stub_ollama import serve
+    from graph.llm_gateway import ollama_model_factory
+
+    server, _ = serve(latency_s=args.llm_latency, grade_latency_s=args.grade_latency, embed_latency_s=args.embed_latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["OLLAMA_HOST"] = url
+    gateway.set_model_factory(ollama_model_factory)  # drop any clients bound to an older host
+    embeddings = OllamaEmbeddings(model=cfg.embedding_model, base_url=url)
+    ingest(cfg, embeddings=embeddings)
+    set_retriever(build_retriever(str(cfg.persist_directory), cfg.collection_name, embeddings))
+    return {"backend": "stub", "ollama_host": url}
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+
+def _run_one(app, entry: LogEntry, scheduled_at: float) -> Result:
+    from graph.tracing import tracer
+
+    started = time.perf_counter()
+    try:
+        with tracer.trace("loadgen", question=entry.question) as tr:
+            out = app.invoke({"question": entry.question})
+        ok, error = True, None
+        fallback = str(out.get("generation", "")).startswith(FALLBACK_PREFIX)
+    except Exception as e:
+        ok, error, fallback = False, repr(e), False
+    finished = time.perf_counter()
+
+    nodes: Dict[str, float] = {}
+    llm_calls = 0
+    for sp in tr.spans:
+        if sp.kind == "node":
+            nodes[sp.name] = nodes.get(sp.name, 0.0) + sp.duration_s
+        elif sp.kind == "llm":
+            llm_calls += 1
+
+    # Latency is measured from the scheduled start so queueing under overload is not hidden
+    return Result(entry.question, finished - scheduled_at, finished - started, ok, fallback, nodes, llm_calls, error)
+
+
+def _entries(log: List[LogEntry], limit: int, duration_s: float, t0: float) -> Iterator[LogEntry]:
+    n = 0
+    while True:
+        for entry in log:
+            if (limit and n >= limit) or (duration_s and time.perf_counter() - t0 >= duration_s):
+                return
+            n += 1
+            yield entry
+
+
+def run_open_loop(app, log: List[LogEntry], args: argparse.Namespace) -> List[Result]:
+    results: List[Result] = []
+    futures: List[Future] = []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_inflight, thread_name_prefix="loadgen") as pool:
+        for i, entry in enumerate(_entries(log, args.limit, args.duration, t0)):
+            if args.use_offsets and entry.offset_s is not None:
+                due = t0 + float(entry.offset_s) / args.speedup
+            else:
+                due = t0 + i / args.qps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(_run_one, app, entry, due))
+        for f in futures:
+            results.append(f.result())
+    return results
+
+
+def run_closed_loop(app, log: List[LogEntry], args: argparse.Namespace) -> List[Result]:
+    results: List[Result] = []
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    source = _entries(log, args.limit, args.duration, t0)
+
+    def worker() -> None:
+        while True:
+            with lock:
+                entry = next(source, None)
+            if entry is None:
+                return
+            res = _run_one(app, entry, time.perf_counter())
+            with lock:
+                results.append(res)
+            if args.think_times and entry.think_time_s > 0:
+                time.sleep(entry.think_time_s / args.speedup)
+
+    threads = [threading.Thread(target=worker, name=f"loadgen-{i}") for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def summarize(results: List[Result], elapsed_s: float) -> Dict[str, Any]:
+    ok = [r for r in results if r.ok]
+    node_names = sorted({n for r in ok for n in r.nodes})
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "elapsed_s": round(elapsed_s, 4),
+        "throughput_qps": round(len(ok) / elapsed_s, 4) if elapsed_s else 0.0,
+        "latency_s": percentiles([r.latency_s for r in ok]),
+        "service_time_s": percentiles([r.service_s for r in ok]),
+        "fallback_rate": round(sum(r.fallback for r in ok) / len(ok), 4) if ok else 0.0,
+        "llm_calls_per_question": percentiles([r.llm_calls for r in ok]),
+        "node_latency_s": {n: percentiles([r.nodes[n] for r in ok if n in r.nodes]) for n in node_names},
+        "sample_errors": sorted({r.error for r in results if r.error})[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a JSONL question log against the RAG graph")
+    parser.add_argument("log", type=Path, help="JSONL file with one {'question': ...} per line")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--qps", type=float, help="open-loop arrival rate")
+    mode.add_argument("--concurrency", type=int, help="closed-loop number of concurrent users")
+    parser.add_argument("--use-offsets", action="store_true", help="open loop: replay recorded offset_s arrivals")
+    parser.add_argument("--think-times", action="store_true", help="closed loop: sleep recorded think_time_s")
+    parser.add_argument("--speedup", type=float, default=1.0, help="divide recorded offsets / think-times")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop issuing after N seconds (0 = one pass)")
+    parser.add_argument("--limit", type=int, default=0, help="stop after N questions (0 = one pass)")
+    parser.add_argument("--max-inflight", type=int, default=64, help="open loop: worker threads")
+    parser.add_argument("--backend", choices=["stub", "fake", "live"], default="stub")
+    parser.add_argument("--corpus-docs", type=int, default=20, help="stub/fake: synthetic PDFs to ingest")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--grade-latency", type=float, default=0.05)
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--out", type=Path, default=None, help="write the report as JSON")
+    args = parser.parse_args()
+
+    log = load_log(args.log)
+    if not args.duration and not args.limit:
+        args.limit = len(log)
+
+    with tempfile.TemporaryDirectory(prefix="rag-loadgen-") as tmp:
+        backend = setup_backend(args, Path(tmp))
+        from graph.graph_flow import app
+        from graph.llm_gateway import gateway
+
+        t0 = time.perf_counter()
+        results = run_open_loop(app, log, args) if args.qps else run_closed_loop(app, log, args)
+        report = {
+            **backend,
+            "mode": {"qps": args.qps} if args.qps else {"concurrency": args.concurrency},
+            **summarize(results, time.perf_counter() - t0),
+            "llm_gateway": gateway.metrics(),
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Offline benchmark suite: synthetic PDFs, fake embeddings and fake chat models.
+
+    python -m benchmarks.run --docs 40 --out benchmarks/results/current.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from benchmarks.corpus import build_corpus
+from benchmarks.fakes import FakeEmbeddings, fake_model_factory
+from graph.llm_gateway import gateway, ollama_model_factory
+from graph.tracing import tracer
+from ingestion import IngestionConfig, ingest
+from ingestion_retrival import build_retriever, set_retriever
+
+FALLBACK_PREFIX = "I don't know the answer to that question."
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def q(p: float) -> float:
+        idx = min(len(ordered) - 1, max(0, int(round(p * (len(ordered) - 1)))))
+        return round(ordered[idx], 6)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 6),
+        "p50": q(0.50),
+        "p95": q(0.95),
+        "p99": q(0.99),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def resolve_token_counter(choice: str) -> str:
+    # tiktoken downloads its encoding on first use; fall back to the char approximation offline
+    if choice != "auto":
+        return choice
+    try:
+        import tiktoken
+
+        tiktoken.get_encoding("cl100k_base")
+        return "tiktoken"
+    except Exception:
+        return "chars"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+# -----------------------------
+# Benchmark Stages
+# -----------------------------
+
+def bench_ingestion(cfg: IngestionConfig, embeddings: FakeEmbeddings) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    manifest = ingest(cfg, embeddings=embeddings)
+    elapsed = time.perf_counter() - t0
+    return {
+        "seconds": round(elapsed, 4),
+        "pdf_count": manifest["pdf_count"],
+        "page_docs_count": manifest["page_docs_count"],
+        "chunk_count": manifest["chunk_count"],
+        "pages_per_s": round(manifest["page_docs_count"] / elapsed, 2) if elapsed else 0.0,
+        "chunks_per_s": round(manifest["chunk_count"] / elapsed, 2) if elapsed else 0.0,
+        "embedding_calls": embeddings.calls,
+    }
+
+
+def bench_retrieval(retriever, questions, repeats: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    on_doc: List[float] = []
+    for _ in range(repeats):
+        for sq in questions:
+            t0 = time.perf_counter()
+            docs = retriever.invoke(sq.question)
+            latencies.append(time.perf_counter() - t0)
+            if sq.expect_answer and docs:
+                # Share of the top-k that comes from the document the question was written about
+                on_doc.append(sum(d.metadata.get("source") == sq.doc_name for d in docs) / len(docs))
+    return {
+        "latency_s": percentiles(latencies),
+        "doc_precision": round(statistics.fmean(on_doc), 4) if on_doc else 0.0,
+    }
+
+
+def bench_graph(questions, repeats: int) -> Dict[str, Any]:
+    from graph.graph_flow import app
+
+    per_question: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    for _ in range(repeats):
+        for sq in questions:
+            t0 = time.perf_counter()
+            with tracer.trace("benchmark", question=sq.question) as tr:
+                out = app.invoke({"question": sq.question})
+            elapsed = time.perf_counter() - t0
+            latencies.append(elapsed)
+
+            summary = tr.summary()
+            fallback = str(out.get("generation", "")).startswith(FALLBACK_PREFIX)
+            per_question.append(
+                {
+                    "question": sq.question,
+                    "latency_s": round(elapsed, 6),
+                    "llm_calls": summary["llm_calls"],
+                    "prompt_tokens": summary["prompt_tokens"],
+                    "completion_tokens": summary["completion_tokens"],
+                    "routes": summary["routes"],
+                    "fallback": fallback,
+                    "false_fallback": fallback and sq.expect_answer,
+                }
+            )
+
+    calls = [r["llm_calls"] for r in per_question]
+    return {
+        "latency_s": percentiles(latencies),
+        "llm_calls_per_question": percentiles(calls),
+        "llm_calls_total": sum(calls),
+        "fallback_rate": round(sum(r["fallback"] for r in per_question) / len(per_question), 4),
+        "false_fallbacks": sum(r["false_fallback"] for r in per_question),
+        "per_question": per_question,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as tmp:
+        root = Path(tmp)
+        questions = build_corpus(root / "Dataset", n_docs=args.docs, pages_per_doc=args.pages, seed=args.seed)
+        cfg = IngestionConfig(
+            dataset_dir=root / "Dataset",
+            persist_directory=root / ".chroma",
+            collection_name="rag-bench",
+            manifest_path=root / "ingestion_manifest.json",
+            token_counter=resolve_token_counter(args.token_counter),
+        )
+        embeddings = FakeEmbeddings(latency_s=args.embed_latency)
+
+        ingestion = bench_ingestion(cfg, embeddings) | {"token_counter": cfg.token_counter}
+        retriever = build_retriever(str(cfg.persist_directory), cfg.collection_name, embeddings, doc_top_m=args.doc_top_m)
+        retrieval = bench_retrieval(retriever, questions, args.repeats)
+
+        gateway.set_model_factory(fake_model_factory(args.llm_latency, args.grade_latency))
+        set_retriever(retriever)
+        try:
+            graph = bench_graph(questions, args.repeats)
+        finally:
+            set_retriever(None)
+            gateway.set_model_factory(ollama_model_factory)
+
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "params": vars(args) | {"out": str(args.out), "compare": str(args.compare) if args.compare else None},
+        },
+        "ingestion": ingestion,
+        "retrieval": retrieval,
+        "graph": graph,
+        "llm_gateway": gateway.metrics(),
+    }
+
+
+# -----------------------------
+# Regression Comparison
+# -----------------------------
+
+KEY_METRICS = [
+    ("ingestion", "chunks_per_s", "higher"),
+    ("retrieval", "latency_s.p50", "lower"),
+    ("retrieval", "latency_s.p95", "lower"),
+    ("retrieval", "doc_precision", "higher"),
+    ("graph", "latency_s.p50", "lower"),
+    ("graph", "latency_s.p95", "lower"),
+    ("graph", "latency_s.p99", "lower"),
+    ("graph", "llm_calls_per_question.mean", "lower"),
+    ("graph", "false_fallbacks", "lower"),
+]
+
+
+def _lookup(d: Dict[str, Any], dotted: str) -> Any:
+    for part in dotted.split("."):
+        d = d.get(part, {}) if isinstance(d, dict) else {}
+    return d if isinstance(d, (int, float)) else None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines = [f"baseline {baseline['meta']['git_revision']} -> current {current['meta']['git_revision']}"]
+    for section, key, better in KEY_METRICS:
+        old, new = _lookup(baseline.get(section, {}), key), _lookup(current.get(section, {}), key)
+        if old is None or new is None:
+            continue
+        delta = (new - old) / old * 100 if old else 0.0
+        worse = (delta > 0) if better == "lower" else (delta < 0)
+        flag = "REGRESSION" if worse and abs(delta) >= 10 else ""
+        lines.append(f"{section}.{key:<32} {old:>12.4f} -> {new:>12.4f} ({delta:+.1f}%) {flag}".rstrip())
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark with deterministic fakes")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per generation call")
+    parser.add_argument("--grade-latency", type=float, default=0.02, help="seconds per grader call")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding call")
+    parser.add_argument("--doc-top-m", type=int, default=0, help="two-stage retrieval over the top-M documents (0 = off)")
+    parser.add_argument("--token-counter", choices=["auto", "tiktoken", "chars"], default="auto")
+    parser.add_argument("--out", type=Path, default=None, help="results JSON (default benchmarks/results/<rev>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    out = args.out or Path("benchmarks/results") / f"{results['meta']['git_revision']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    g = results["graph"]
+    print(f"ingestion: {results['ingestion']['chunks_per_s']} chunks/s")
+    r = results["retrieval"]
+    print(f"retrieval p50/p95: {r['latency_s']['p50']}s / {r['latency_s']['p95']}s  doc precision: {r['doc_precision']}")
+    print(f"graph p50/p95/p99: {g['latency_s']['p50']}s / {g['latency_s']['p95']}s / {g['latency_s']['p99']}s")
+    print(f"llm calls/question: {g['llm_calls_per_question']['mean']}  fallback rate: {g['fallback_rate']}")
+    print(f"results written to {out}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print("\n".join(compare(results, baseline)))
+
+
+if __name__ == "__main__":
+    main()
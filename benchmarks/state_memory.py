@@ -0,0 +1,107 @@
+"""Retained memory of many concurrent graph states: full Documents vs ChunkRefs.
+
+Each simulated session holds the state a question has after retrieval (what every later
+node carries through the retry loop). Questions repeat across sessions, as they do under
+real traffic, so refs share one copy of each chunk in the chunk store.
+
+    python -m benchmarks.state_memory --sessions 2000 --docs 20
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.corpus import build_corpus
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.run import resolve_token_counter
+from graph.chunks import as_refs, chunk_store
+from ingestion import IngestionConfig, ingest
+from ingestion_retrival import build_retriever, search_with_scores
+
+
+def _retained_bytes(build: Callable[[], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    states = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    return {
+        "sessions": len(states),
+        "retained_bytes": retained,
+        "bytes_per_session": round(retained / len(states), 1) if states else 0.0,
+        "chunks_per_session": round(sum(len(s["documents"]) for s in states) / len(states), 2) if states else 0.0,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="rag-state-mem-") as tmp:
+        root = Path(tmp)
+        questions = [q.question for q in build_corpus(root / "Dataset", n_docs=args.docs, seed=args.seed)]
+        cfg = IngestionConfig(
+            dataset_dir=root / "Dataset",
+            persist_directory=root / ".chroma",
+            collection_name="rag-state-mem",
+            manifest_path=root / "ingestion_manifest.json",
+            token_counter=resolve_token_counter(args.token_counter),
+        )
+        embeddings = FakeEmbeddings()
+        ingest(cfg, embeddings=embeddings)
+        retriever = build_retriever(str(cfg.persist_directory), cfg.collection_name, embeddings, k=args.k)
+
+        session_questions = [questions[i % len(questions)] for i in range(args.sessions)]
+        for q in questions:  # warm Chroma so its caches are not charged to either variant
+            search_with_scores(retriever, q)
+
+        def documents_state() -> List[Dict[str, Any]]:
+            return [{"question": q, "documents": retriever.invoke(q)} for q in session_questions]
+
+        def refs_state() -> List[Dict[str, Any]]:
+            states = []
+            for q in session_questions:
+                hits = search_with_scores(retriever, q)
+                states.append({"question": q, "documents": as_refs([d for d, _ in hits], [s for _, s in hits])})
+            return states
+
+        chunk_store.clear()
+        baseline = _retained_bytes(documents_state)
+        refs = _retained_bytes(refs_state)  # includes the chunk store it fills
+        store_chunks = len(chunk_store)
+        chunk_store.clear()
+
+    return {
+        "params": {"sessions": args.sessions, "docs": args.docs, "k": args.k, "distinct_questions": len(questions)},
+        "documents": baseline,
+        "chunk_refs": refs | {"store_chunks": store_chunks},
+        "reduction": round(1 - refs["retained_bytes"] / baseline["retained_bytes"], 4) if baseline["retained_bytes"] else 0.0,
+        "python": sys.version.split()[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare retained GraphState memory: Documents vs ChunkRefs")
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent sessions to hold in memory")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--token-counter", choices=["auto", "tiktoken", "chars"], default="auto")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Minimal Ollama-compatible HTTP server backed by the deterministic fakes.
+
+Serves /api/chat (streaming and non-streaming, incl. JSON-schema `format`), /api/embed,
+/api/embeddings, /api/tags and /api/version so the real ChatOllama / OllamaEmbeddings
+clients can be exercised without GPUs or model downloads.
+
+    python -m benchmarks.stub_ollama --port 11500 --latency 0.2 --grade-latency 0.05
+    OLLAMA_HOST=http://127.0.0.1:11500 python -m benchmarks.loadgen --backend live ...
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+
+
+class StubState:
+    def __init__(self, latency_s: float, grade_latency_s: Optional[float], embed_latency_s: float) -> None:
+        self.model = FakeChatModel(latency_s=latency_s, structured_latency_s=grade_latency_s)
+        self.embeddings = FakeEmbeddings(latency_s=embed_latency_s)
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+
+    def count(self, path: str) -> None:
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _to_messages(raw: List[Dict[str, Any]]):
+    out = []
+    for m in raw:
+        cls = SystemMessage if m.get("role") == "system" else HumanMessage
+        out.append(cls(content=m.get("content", "")))
+    return out
+
+
+def _chat(state: StubState, body: Dict[str, Any]) -> Tuple[str, int, int]:
+    fmt = body.get("format")
+    kwargs: Dict[str, Any] = {}
+    if isinstance(fmt, dict):
+        field = (fmt.get("properties") or {}).get("binary_score", {})
+        kwargs = {
+            "fake_schema": fmt.get("title", "schema"),
+            "fake_field_type": "bool" if field.get("type") == "boolean" else "str",
+        }
+    result = state.model._generate(_to_messages(body.get("messages", [])), **kwargs)
+    msg = result.generations[0].message
+    usage = msg.usage_metadata or {}
+    return str(msg.content), int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _json(self, payload: Dict[str, Any], status: int = 200) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self) -> None:  # noqa: N802 (http.server API)
+            state.count(self.path)
+            if self.path == "/api/tags":
+                self._json({"models": [{"name": "llama3.1:latest"}, {"name": "nomic-embed-text:latest"}]})
+            elif self.path == "/api/version":
+                self._json({"version": "0.0.0-stub"})
+            elif self.path == "/":
+                self._json({"status": "Ollama stub is running"})
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_POST(self) -> None:  # noqa: N802 (http.server API)
+            state.count(self.path)
+            body = self._body()
+            model = body.get("model", "stub")
+
+            if self.path == "/api/chat":
+                content, prompt_tokens, completion_tokens = _chat(state, body)
+                final = {
+                    "model": model,
+                    "created_at": _now(),
+                    "message": {"role": "assistant", "content": "" if body.get("stream", True) else content},
+                    "done": True,
+                    "done_reason": "stop",
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": completion_tokens,
+                }
+                if not body.get("stream", True):
+                    self._json(final)
+                    return
+                lines = [
+                    {"model": model, "created_at": _now(), "message": {"role": "assistant", "content": content}, "done": False},
+                    final,
+                ]
+                payload = b"".join(json.dumps(x).encode("utf-8") + b"\n" for x in lines)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            if self.path == "/api/embed":
+                inputs = body.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+                self._json({"model": model, "embeddings": state.embeddings.embed_documents(inputs)})
+                return
+
+            if self.path == "/api/embeddings":
+                self._json({"embedding": state.embeddings.embed_query(body.get("prompt", ""))})
+                return
+
+            self._json({"error": f"unsupported endpoint {self.path}"}, 404)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_s: float = 0.0,
+    grade_latency_s: Optional[float] = None,
+    embed_latency_s: float = 0.0,
+) -> Tuple[ThreadingHTTPServer, StubState]:
+    """Start the stub in a daemon thread; port 0 picks a free port (see server.server_address)."""
+    state = StubState(latency_s, grade_latency_s, embed_latency_s)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ollama-stub", daemon=True).start()
+    return server, state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ollama-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per generation call")
+    parser.add_argument("--grade-latency", type=float, default=None, help="seconds per structured (grader) call")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding request")
+    args = parser.parse_args()
+
+    server, _ = serve(args.host, args.port, args.latency, args.grade_latency, args.embed_latency)
+    print(f"Ollama stub listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from benchmarks.run import compare, run_benchmark
+from graph.chains.retrieval_grader_chain import GradeDocuments, grade_prompt
+
+
+def test_fakes_are_deterministic() -> None:
+    assert FakeEmbeddings().embed_query("credit scoring") == FakeEmbeddings().embed_query("credit scoring")
+
+    grader = grade_prompt | FakeChatModel().with_structured_output(GradeDocuments)
+    doc = "At Aldermoor, credit scoring relies on gradient boosted models."
+    assert grader.invoke({"document": doc, "question": "How does Aldermoor use credit scoring?"}).binary_score == "yes"
+    assert grader.invoke({"document": doc, "question": "How to make pizza?"}).binary_score == "no"
+
+
+def test_benchmark_runs_offline(tmp_path) -> None:
+    args = argparse.Namespace(
+        docs=3, pages=3, repeats=1, seed=1, llm_latency=0.0, grade_latency=0.0, embed_latency=0.0,
+        token_counter="chars", doc_top_m=0, out=tmp_path / "r.json", compare=None,
+    )
+    results = run_benchmark(args)
+
+    assert results["ingestion"]["pdf_count"] == 3
+    assert results["graph"]["latency_s"]["count"] == 5  # 3 on-topic + 2 off-topic questions
+    assert results["graph"]["false_fallbacks"] == 0
+    assert all(r["llm_calls"] > 0 for r in results["graph"]["per_question"])
+    assert compare(results, results)[1].endswith("(+0.0%)")
+
+
+def test_stub_ollama_serves_real_clients() -> None:
+    from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+    from benchmarks.stub_ollama import serve
+    from graph.chains.hallucination_grader_chain import GradeHallucinations
+
+    server, state = serve()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        llm = ChatOllama(model="llama3.1:latest", base_url=url)
+        answer = llm.invoke("Sources:\n[1] Credit models use repayment history. More text.\n\nAnswer:")
+        assert answer.content == "Credit models use repayment history. [1]"
+        assert answer.usage_metadata["output_tokens"] > 0
+
+        grade = (grade_prompt | llm.with_structured_output(GradeDocuments)).invoke(
+            {"document": "Aldermoor credit scoring", "question": "Aldermoor credit scoring?"}
+        )
+        assert grade.binary_score == "yes"
+        assert llm.with_structured_output(GradeHallucinations).invoke("x").binary_score is True
+
+        assert len(OllamaEmbeddings(model="nomic-embed-text:latest", base_url=url).embed_query("hi")) == 256
+        assert state.requests["/api/chat"] == 3
+    finally:
+        server.shutdown()
@@ -0,0 +1,80 @@
+import argparse
+import json
+import time
+
+import pytest
+
+from benchmarks.corpus import ENTITIES, OFF_TOPIC_QUESTIONS, TOPICS
+from benchmarks.loadgen import Result, load_log, run_closed_loop, run_open_loop, setup_backend, summarize
+from graph.consts import FALLBACK, RETRIEVE
+from graph.llm_gateway import gateway, ollama_model_factory
+from ingestion_retrival import set_retriever
+
+
+@pytest.fixture(scope="module")
+def fake_app(tmp_path_factory):
+    root = tmp_path_factory.mktemp("loadgen")
+    args = argparse.Namespace(backend="fake", corpus_docs=2, llm_latency=0.0, grade_latency=0.0, embed_latency=0.0)
+    try:
+        setup_backend(args, root)
+        from graph.graph_flow import app
+
+        yield app, root
+    finally:
+        set_retriever(None)
+        gateway.set_model_factory(ollama_model_factory)
+
+
+def _log(root, think_time_s: float = 0.0):
+    path = root / "questions.jsonl"
+    rows = [
+        {"question": f"How does {ENTITIES[0]} use AI for {TOPICS[0][0]}?", "think_time_s": think_time_s},
+        {"question": OFF_TOPIC_QUESTIONS[0], "think_time_s": think_time_s},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    return load_log(path)
+
+
+def _args(**overrides) -> argparse.Namespace:
+    base = dict(limit=4, duration=0.0, use_offsets=False, speedup=1.0, qps=None, max_inflight=4,
+                concurrency=None, think_times=False)
+    return argparse.Namespace(**(base | overrides))
+
+
+def test_open_loop_paces_arrivals_and_summarizes(fake_app) -> None:
+    app, root = fake_app
+    t0 = time.perf_counter()
+    results = run_open_loop(app, _log(root), _args(qps=20.0))
+    elapsed = time.perf_counter() - t0
+
+    # The 4th arrival is scheduled 3/qps after the first
+    assert elapsed >= 3 / 20.0
+    summary = summarize(results, elapsed)
+    assert summary["requests"] == 4 and summary["errors"] == 0
+    assert summary["latency_s"]["count"] == summary["service_time_s"]["count"] == 4
+    # One on-topic and one off-topic question, replayed twice
+    assert summary["fallback_rate"] == 0.5
+    assert summary["llm_calls_per_question"]["mean"] > 0
+    assert summary["node_latency_s"][RETRIEVE]["count"] == 4
+    assert summary["node_latency_s"][FALLBACK]["count"] == 2 and summary["sample_errors"] == []
+
+
+def test_closed_loop_replays_think_times(fake_app) -> None:
+    app, root = fake_app
+    t0 = time.perf_counter()
+    results = run_closed_loop(app, _log(root, think_time_s=0.1), _args(concurrency=2, think_times=True, speedup=2.0))
+    elapsed = time.perf_counter() - t0
+
+    # Each of the 2 users answers 2 questions and thinks 0.05s after each one
+    assert len(results) == 4 and all(r.ok for r in results)
+    assert elapsed >= 0.1
+    assert summarize(results, elapsed)["throughput_qps"] == pytest.approx(4 / elapsed, rel=1e-3)
+
+
+def test_summary_counts_errors_separately() -> None:
+    ok = Result("q", 0.2, 0.1, True, True, {"retrieve": 0.05}, 3)
+    failed = Result("q", 1.0, 1.0, False, False, {}, 0, error="GatewayTimeout()")
+    summary = summarize([ok, failed], elapsed_s=2.0)
+    assert summary["requests"] == 2 and summary["errors"] == 1
+    assert summary["throughput_qps"] == 0.5 and summary["fallback_rate"] == 1.0
+    assert summary["latency_s"]["p99"] == 0.2 and summary["sample_errors"] == ["GatewayTimeout()"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+
+# -----------------------------
+# Parent Docstore (parent-child chunking)
+# -----------------------------
+
+class ParentDocstore:
+    """Compact on-disk store for parent sections, keyed by their stable chunk id.
+
+    Text is zlib-compressed in a single SQLite file; the doc_id column lets a shard
+    rebuild drop the parents of exactly the documents it re-ingests.
+    """
+
+    def __init__(self, path: Path, read_only: bool = False) -> None:
+        self.path = Path(path)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{self.path.as_posix()}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parents ("
+                " id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, text BLOB NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS parents_doc_id ON parents (doc_id)")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def put_many(self, items: Iterable[Tuple[str, Document]]) -> int:
+        rows = [
+            (
+                pid,
+                str((doc.metadata or {}).get("doc_id", "")),
+                zlib.compress(doc.page_content.encode("utf-8")),
+                json.dumps(doc.metadata or {}),
+            )
+            for pid, doc in items
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO parents VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def get_many(self, ids: Sequence[str]) -> Dict[str, Document]:
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, text, metadata FROM parents WHERE id IN ({marks})", list(ids)).fetchall()
+        return {
+            pid: Document(id=pid, page_content=zlib.decompress(blob).decode("utf-8"), metadata=json.loads(md))
+            for pid, blob, md in rows
+        }
+
+    def doc_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT doc_id FROM parents")]
+
+    def delete_docs(self, keep: Callable[[str], bool]) -> int:
+        """Delete every parent whose doc_id fails `keep`."""
+        doomed = [d for d in self.doc_ids() if not keep(d)]
+        with self._lock:
+            self._conn.executemany("DELETE FROM parents WHERE doc_id = ?", [(d,) for d in doomed])
+            self._conn.commit()
+        return len(doomed)
+
+    def copy_to(self, path: Path) -> None:
+        """Consistent copy of the whole store (sqlite backup), e.g. to seed a staging build."""
+        dest = sqlite3.connect(str(path))
+        try:
+            with self._lock:
+                self._conn.backup(dest)
+        finally:
+            dest.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0])
@@ -1,7 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableSequence
-from langchain_ollama import ChatOllama
 from pydantic import BaseModel, Field
+from graph.config import config
+from graph.llm_gateway import Priority, gateway
 
 
 class GradeAnswer(BaseModel):
@@ -11,8 +12,7 @@ class GradeAnswer(BaseModel):
     )
 
 
-llm = ChatOllama(model='llama3.1:latest', temperature=0)
-structured_llm_grader = llm.with_structured_output(GradeAnswer)
+structured_llm_grader = gateway.runnable(config.llm_model, schema=GradeAnswer, priority=Priority.VERIFICATION)
 
 system = """You are a grader assessing whether an answer addresses / resolves a question \n 
      Give a binary score 'yes' or 'no'. Yes' means that the answer resolves the question."""
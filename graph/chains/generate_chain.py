@@ -1,13 +1,14 @@
 import re
 from typing import Any, Dict, List, Set
-from langchain_ollama import ChatOllama
 from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda, RunnableSequence
+from graph.config import config
+from graph.llm_gateway import Priority, gateway
 
 
-llm = ChatOllama(model="llama3.1:latest", temperature=0)
+llm = gateway.runnable(config.llm_model, priority=Priority.GENERATION)
 
 SYSTEM_PROMPT = """You are a RAG assistant. Answer the user's question using ONLY the provided sources.
 Rules:
@@ -45,11 +46,20 @@ response_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-generate: RunnableSequence = (
-    RunnableLambda(_to_prompt_inputs)
-    | response_prompt
-    | llm
-    | StrOutputParser()
+def _generate_chain(llm_runnable) -> RunnableSequence:
+    return (
+        RunnableLambda(_to_prompt_inputs)
+        | response_prompt
+        | llm_runnable
+        | StrOutputParser()
+    )
+
+
+generate: RunnableSequence = _generate_chain(llm)
+
+# Speculative drafts queue behind grading, so a draft that ends up discarded cannot delay real calls
+speculative_generate: RunnableSequence = _generate_chain(
+    gateway.runnable(config.llm_model, priority=Priority.SPECULATIVE)
 )
 
 
@@ -1,9 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableSequence
-from langchain_ollama import ChatOllama
 from pydantic import BaseModel, Field
-
-llm = ChatOllama(model='llama3.1:latest', temperature=0)
+from graph.config import config
+from graph.llm_gateway import Priority, gateway
 
 
 class GradeHallucinations(BaseModel):
@@ -14,7 +13,7 @@ class GradeHallucinations(BaseModel):
     )
 
 
-structured_llm_grader = llm.with_structured_output(GradeHallucinations)
+structured_llm_grader = gateway.runnable(config.llm_model, schema=GradeHallucinations, priority=Priority.VERIFICATION)
 
 system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
      Give a binary score 'yes' or 'no'. 'Yes' means that the answer is grounded in / supported by the set of facts."""
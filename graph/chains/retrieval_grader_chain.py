@@ -1,8 +1,7 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
 from pydantic import BaseModel, Field
-
-llm = ChatOllama(model='llama3.1:latest', temperature=0)
+from graph.config import config
+from graph.llm_gateway import Priority, gateway
 
 
 class GradeDocuments(BaseModel):
@@ -13,7 +12,7 @@ class GradeDocuments(BaseModel):
     )
 
 
-structured_llm_grader = llm.with_structured_output(GradeDocuments)
+structured_llm_grader = gateway.runnable(config.llm_model, schema=GradeDocuments, priority=Priority.GRADING)
 
 system = """You are a strict grader assessing whether a retrieved document is relevant to a user question.
 
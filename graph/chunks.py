@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+
+from graph.config import config
+
+Loader = Callable[[List[str]], List[Document]]
+
+
+def chunk_key(d: Document) -> str:
+    # Prefer the vectorstore id; fall back to the stable citation metadata
+    if getattr(d, "id", None):
+        return str(d.id)
+    md = d.metadata or {}
+    if md.get("doc_id") is not None:
+        return f"{md.get('doc_id')}::p{md.get('page_start', md.get('page'))}::c{md.get('chunk_id')}"
+    return str(md.get("content_hash") or hashlib.sha1(d.page_content.encode("utf-8")).hexdigest())
+
+
+# -----------------------------
+# Chunk References (what GraphState carries)
+# -----------------------------
+
+@dataclass(frozen=True, slots=True)
+class ChunkRef:
+    """Handle to a chunk held once in the shared `chunk_store`.
+
+    `page_content` / `metadata` are read lazily from the store, so prompt builders and
+    citation code use a ref exactly like a Document.
+    """
+
+    id: str
+    score: Optional[float] = None  # retrieval distance (lower is closer); None when unknown
+    content_hash: str = ""
+
+    @property
+    def page_content(self) -> str:
+        return chunk_store.entry(self.id, self.content_hash)[0]
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        return chunk_store.entry(self.id, self.content_hash)[1]
+
+    def to_document(self) -> Document:
+        text, md = chunk_store.entry(self.id, self.content_hash)
+        return Document(id=self.id, page_content=text, metadata=dict(md))
+
+
+ChunkLike = Union[Document, ChunkRef]
+
+
+# -----------------------------
+# Shared Chunk Store
+# -----------------------------
+
+class StaleChunkError(KeyError):
+    """The chunk behind a ref was re-ingested with different content after the ref was taken."""
+
+
+class ChunkStore:
+    """Process-wide, read-only chunk text shared by every session (thread-safe).
+
+    Each chunk id is held once, LRU-bounded by `capacity`; an evicted chunk is re-read
+    through `loader` the next time a ref touches it. Interning a chunk whose content_hash
+    changed (e.g. after a re-ingest) replaces the stored copy; reading it through a ref that
+    holds the old hash raises StaleChunkError rather than returning text that was never graded.
+    """
+
+    def __init__(self, capacity: int, loader: Optional[Loader] = None) -> None:
+        self.capacity = max(1, capacity)
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, Mapping[str, Any]]]" = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+    def set_loader(self, loader: Optional[Loader]) -> None:
+        self._loader = loader
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def _is_stale(entry: Tuple[str, Mapping[str, Any]], d: Document) -> bool:
+        # Chunk ids are positional (doc::page::chunk), so a re-ingest can reuse an id for new text
+        incoming = (d.metadata or {}).get("content_hash")
+        if incoming:
+            return incoming != entry[1].get("content_hash")
+        return d.page_content != entry[0]
+
+    def _put(self, key: str, d: Document) -> Tuple[str, Mapping[str, Any]]:
+        # Caller holds the lock; an identical copy reuses the stored one so duplicates can be freed
+        entry = self._entries.get(key)
+        if entry is not None and not self._is_stale(entry, d):
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = (d.page_content, MappingProxyType(dict(d.metadata or {})))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def intern(self, d: Document, score: Optional[float] = None) -> ChunkRef:
+        key = chunk_key(d)
+        with self._lock:
+            _, md = self._put(key, d)
+        return ChunkRef(id=key, score=score, content_hash=str(md.get("content_hash", "")))
+
+    @staticmethod
+    def _matches(entry: Tuple[str, Mapping[str, Any]], content_hash: str) -> bool:
+        return not content_hash or entry[1].get("content_hash") == content_hash
+
+    def entry(self, key: str, content_hash: str = "") -> Tuple[str, Mapping[str, Any]]:
+        """Text + metadata of a chunk; with `content_hash`, only the version that hash names."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._matches(entry, content_hash):
+                self._entries.move_to_end(key)
+                return entry
+
+        # Not cached, or cached at another version: the backing store has the current one
+        loaded = self._loader([key]) if self._loader is not None else []
+        with self._lock:
+            self.loads += 1
+            for d in loaded:
+                if chunk_key(d) == key:
+                    if not self._matches((d.page_content, d.metadata or {}), content_hash):
+                        break
+                    return self._put(key, d)
+        if loaded or entry is not None:
+            raise StaleChunkError(f"Chunk {key!r} changed since it was retrieved (content_hash {content_hash!r})")
+        raise KeyError(f"Chunk {key!r} is not in the chunk store and could not be reloaded")
+
+
+def _default_loader(ids: List[str]) -> List[Document]:
+    from ingestion_retrival import fetch_chunks
+
+    return fetch_chunks(ids)
+
+
+chunk_store = ChunkStore(config.chunk_store_capacity, loader=_default_loader)
+
+
+def as_refs(documents: Iterable[ChunkLike], scores: Optional[Sequence[Optional[float]]] = None) -> List[ChunkRef]:
+    """Intern Documents into the shared store; refs pass through unchanged."""
+    docs = list(documents)
+    scores = list(scores) if scores is not None else [None] * len(docs)
+    return [d if isinstance(d, ChunkRef) else chunk_store.intern(d, s) for d, s in zip(docs, scores)]
+
+
+def resolve(documents: Iterable[ChunkLike]) -> List[Document]:
+    """Materialize Documents for code that needs the real type (e.g. prompt reprs)."""
+    return [d.to_document() if isinstance(d, ChunkRef) else d for d in documents]
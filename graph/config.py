@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return float(raw)
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return int(raw)
+
+
+# -----------------------------
+# Graph Configuration
+# -----------------------------
+
+@dataclass(frozen=True)
+class GraphConfig:
+    # Speculative generation: start drafting on the top retrieved chunks while grading runs
+    speculative_generation: bool = False
+    speculative_top_n: int = 0  # 0 = speculate on every retrieved chunk
+    speculative_workers: int = 4
+
+    # Adaptive-k: grade the ranking page by page, stop once enough chunks pass
+    adaptive_k: bool = False
+    adaptive_k_initial: int = 3  # first page graded
+    adaptive_k_step: int = 3  # further page size while too few chunks pass
+    adaptive_k_max: int = 12  # candidates retrieved (and at most graded)
+    adaptive_k_enough: int = 2  # relevant chunks that end the search
+
+    # Shared LLM gateway (per-model limits)
+    llm_model: str = "llama3.1:latest"
+    llm_max_concurrency: int = 2
+    llm_rate_per_s: float = 0.0  # 0 = no rate limit
+    llm_burst: int = 4
+    llm_timeout_s: float = 120.0
+    llm_queue_timeout_s: float = 300.0
+
+    # Shared chunk store behind the ChunkRefs in GraphState
+    chunk_store_capacity: int = 4096  # chunks held in memory; evicted ones are re-read by id
+
+    # Tracing / metrics export
+    trace_jsonl_path: str = ""  # empty = no JSONL sink
+    metrics_port: int = 0  # 0 = no Prometheus endpoint
+
+    @classmethod
+    def from_env(cls) -> "GraphConfig":
+        return cls(
+            speculative_generation=_env_bool("RAG_SPECULATIVE_GENERATION", cls.speculative_generation),
+            speculative_top_n=_env_int("RAG_SPECULATIVE_TOP_N", cls.speculative_top_n),
+            speculative_workers=_env_int("RAG_SPECULATIVE_WORKERS", cls.speculative_workers),
+            adaptive_k=_env_bool("RAG_ADAPTIVE_K", cls.adaptive_k),
+            adaptive_k_initial=_env_int("RAG_ADAPTIVE_K_INITIAL", cls.adaptive_k_initial),
+            adaptive_k_step=_env_int("RAG_ADAPTIVE_K_STEP", cls.adaptive_k_step),
+            adaptive_k_max=_env_int("RAG_ADAPTIVE_K_MAX", cls.adaptive_k_max),
+            adaptive_k_enough=_env_int("RAG_ADAPTIVE_K_ENOUGH", cls.adaptive_k_enough),
+            llm_model=os.getenv("RAG_LLM_MODEL", cls.llm_model),
+            llm_max_concurrency=_env_int("RAG_LLM_MAX_CONCURRENCY", cls.llm_max_concurrency),
+            llm_rate_per_s=_env_float("RAG_LLM_RATE_PER_S", cls.llm_rate_per_s),
+            llm_burst=_env_int("RAG_LLM_BURST", cls.llm_burst),
+            llm_timeout_s=_env_float("RAG_LLM_TIMEOUT_S", cls.llm_timeout_s),
+            llm_queue_timeout_s=_env_float("RAG_LLM_QUEUE_TIMEOUT_S", cls.llm_queue_timeout_s),
+            chunk_store_capacity=_env_int("RAG_CHUNK_STORE_CAPACITY", cls.chunk_store_capacity),
+            trace_jsonl_path=os.getenv("RAG_TRACE_JSONL", cls.trace_jsonl_path),
+            metrics_port=_env_int("RAG_METRICS_PORT", cls.metrics_port),
+        )
+
+
+config = GraphConfig.from_env()
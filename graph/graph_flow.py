@@ -1,26 +1,39 @@
+import logging
+
 from dotenv import load_dotenv
 
+from graph.config import config
 from graph.state import GraphState
 from langgraph.graph import StateGraph, END
 from graph.consts import GENERATE,RETRIEVE,GRADE_DOCUMENTS, FALLBACK
 from graph.nodes import generate_node, grade_documents_node, retrieve_node, fallback_node
 from graph.chains.hallucination_grader_chain import hallucination_grader
 from graph.chains.answer_grader_chain import answer_grader
+from graph.chunks import resolve
+from graph.tracing import start_metrics_server, traced_node, tracer
 
 
 MAX_RETRIES = 2 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 #Conditional Edge Functions
 
 def relevancy_check(state: GraphState):
-    if state.get("document_relevancy", False):
-        return GENERATE
-    return FALLBACK   
+    route = GENERATE if state.get("document_relevancy", False) else FALLBACK
+    tracer.record_route(GRADE_DOCUMENTS, route)
+    return route
 
 
 def response_checker(state: GraphState):
+    route = _response_route(state)
+    tracer.record_route(GENERATE, "end" if route == END else route)
+    return route
+
+
+def _response_route(state: GraphState):
     MAX_RETRIES = 2  # minimal safety cap to stop infinite loops
 
     question = state["question"]
@@ -30,65 +43,72 @@ def response_checker(state: GraphState):
 
     retries = int(state.get("retries", 0))
 
-    print("---HALLUCINATION: CHECK IF RESPONSE BASED ON CONTEXT---")
     grounded = hallucination_grader.invoke(
-        {"documents": documents, "generation": answer_only}
+        {"documents": resolve(documents), "generation": answer_only}
     ).binary_score
 
     if not grounded:
-        print("---RESPONSE NOT BASED ON CONTEXT---")
         if retries >= MAX_RETRIES:
-            print("---MAX RETRIES HIT, ROUTING TO FALLBACK---")
+            logger.info("response not grounded; max retries (%d) hit", retries)
             return FALLBACK
-        print("---BACK TO GENERATION---")
+        logger.info("response not grounded; regenerating (retry %d)", retries)
         return GENERATE
 
-    print("---GRADER: DOES RESPONSE ANSWER USER QUESTION---")
     answers = answer_grader.invoke(
         {"question": question, "generation": answer_only}
     ).binary_score
 
     if not answers:
-        print("---ANSWER DOES NOT SATISFY QUESTION---")
+        logger.info("answer does not resolve the question")
         return FALLBACK
 
-    print("---ANSWER IS SATISFACTORY---")
     return END
 
 
 
-#Nodes
-workflow = StateGraph(GraphState)
+def build_workflow(entry_point: str = RETRIEVE) -> StateGraph:
+    """Build the graph; a later entry point (e.g. GENERATE) reuses the same nodes and edges for pre-graded inputs."""
 
-workflow.add_node(RETRIEVE,retrieve_node)
+    #Nodes
+    workflow = StateGraph(GraphState)
 
-workflow.add_node(GRADE_DOCUMENTS, grade_documents_node)
+    workflow.add_node(RETRIEVE, traced_node(RETRIEVE, retrieve_node))
 
-workflow.add_node(GENERATE, generate_node)
+    workflow.add_node(GRADE_DOCUMENTS, traced_node(GRADE_DOCUMENTS, grade_documents_node))
 
-workflow.add_node(FALLBACK, fallback_node)
+    workflow.add_node(GENERATE, traced_node(GENERATE, generate_node))
 
+    workflow.add_node(FALLBACK, traced_node(FALLBACK, fallback_node))
 
 
-#Edges
 
-workflow.set_entry_point(RETRIEVE)
+    #Edges
 
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+    workflow.set_entry_point(entry_point)
 
-workflow.add_conditional_edges(GRADE_DOCUMENTS, relevancy_check, {
-    FALLBACK : FALLBACK,
-    GENERATE : GENERATE
-})
+    workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
 
+    workflow.add_conditional_edges(GRADE_DOCUMENTS, relevancy_check, {
+        FALLBACK : FALLBACK,
+        GENERATE : GENERATE
+    })
 
-workflow.add_conditional_edges(GENERATE, response_checker, {
-    FALLBACK : FALLBACK,
-    GENERATE : GENERATE,
-    END : END
-})
 
-workflow.add_edge(FALLBACK, END)
+    workflow.add_conditional_edges(GENERATE, response_checker, {
+        FALLBACK : FALLBACK,
+        GENERATE : GENERATE,
+        END : END
+    })
+
+    workflow.add_edge(FALLBACK, END)
+
+    return workflow
+
+
+workflow = build_workflow()
 
 #App
-app = workflow.compile()
\ No newline at end of file
+app = workflow.compile()
+
+if config.metrics_port:
+    start_metrics_server(config.metrics_port)
\ No newline at end of file
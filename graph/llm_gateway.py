@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple, Type
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_ollama import ChatOllama
+from pydantic import BaseModel
+
+from graph.config import GraphConfig, config
+from graph.tracing import UsageCallback, metrics, tracer, with_callback
+
+
+# -----------------------------
+# Limits + Errors
+# -----------------------------
+
+class Priority(IntEnum):
+    # Lower value is served first
+    GENERATION = 0
+    VERIFICATION = 1
+    GRADING = 2
+    SPECULATIVE = 3  # drafts that may be discarded never hold a slot ahead of real work
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    max_concurrency: int = 2
+    rate_per_s: float = 0.0  # 0 = no rate limit
+    burst: int = 4
+    timeout_s: float = 120.0  # HTTP timeout per call
+    queue_timeout_s: float = 300.0  # max wait for a slot + rate token
+
+
+class GatewayTimeout(TimeoutError):
+    """Raised when a call cannot be admitted before its queue deadline."""
+
+
+ModelFactory = Callable[[str, float, ModelLimits], BaseChatModel]
+
+
+def ollama_model_factory(model: str, temperature: float, limits: ModelLimits) -> BaseChatModel:
+    # One httpx client per model, with keep-alive sized to the concurrency cap
+    pool = httpx.Limits(
+        max_connections=max(1, limits.max_concurrency),
+        max_keepalive_connections=max(1, limits.max_concurrency),
+    )
+    return ChatOllama(
+        model=model,
+        temperature=temperature,
+        client_kwargs={"timeout": limits.timeout_s, "limits": pool},
+    )
+
+
+# -----------------------------
+# Admission Control
+# -----------------------------
+
+class _PrioritySlots:
+    """Counting semaphore that admits waiters by (priority, arrival order)."""
+
+    def __init__(self, permits: int) -> None:
+        self._capacity = max(1, permits)
+        self._permits = self._capacity
+        self._cond = threading.Condition()
+        self._waiters: list[Tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, priority: int, deadline: float) -> bool:
+        with self._cond:
+            entry = (int(priority), next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            admitted = False
+            try:
+                while not (self._permits > 0 and self._waiters[0] == entry):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                heapq.heappop(self._waiters)
+                self._permits -= 1
+                admitted = True
+                return True
+            finally:
+                if not admitted:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self._permits += 1
+            self._cond.notify_all()
+
+    def resize(self, permits: int) -> None:
+        # Calls already admitted keep their slots: shrinking can leave permits below zero until they drain
+        with self._cond:
+            capacity = max(1, permits)
+            self._permits += capacity - self._capacity
+            self._capacity = capacity
+            self._cond.notify_all()
+
+
+class _TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int) -> None:
+        self._rate = rate_per_s
+        self._capacity = float(max(1, burst))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reconfigure(self, rate_per_s: float, burst: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._rate > 0:
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._rate = rate_per_s
+            self._capacity = float(max(1, burst))
+            self._tokens = min(self._tokens, self._capacity)
+
+    def acquire(self, deadline: float) -> bool:
+        if self._rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self._rate
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class _LaneMetrics:
+    def __init__(self, window: int = 1024) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.latency_s: Deque[float] = deque(maxlen=window)
+        self.queue_wait_s: Deque[float] = deque(maxlen=window)
+        self.by_priority: Dict[str, int] = {}
+
+    def snapshot(self, queue_depth: int) -> Dict[str, Any]:
+        with self.lock:
+            lat = list(self.latency_s)
+            wait = list(self.queue_wait_s)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "in_flight": self.in_flight,
+                "queue_depth": queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "by_priority": dict(self.by_priority),
+                "latency_s": {q: round(_percentile(lat, v), 4) for q, v in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+                "queue_wait_s": {q: round(_percentile(wait, v), 4) for q, v in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+            }
+
+
+class _ModelLane:
+    def __init__(self, limits: ModelLimits) -> None:
+        self.limits = limits
+        self.slots = _PrioritySlots(limits.max_concurrency)
+        self.bucket = _TokenBucket(limits.rate_per_s, limits.burst)
+        self.metrics = _LaneMetrics()
+
+    def reconfigure(self, limits: ModelLimits) -> None:
+        # Resized in place: in-flight calls release into the same semaphore, so the new cap holds
+        self.limits = limits
+        self.slots.resize(limits.max_concurrency)
+        self.bucket.reconfigure(limits.rate_per_s, limits.burst)
+
+
+# -----------------------------
+# Gateway
+# -----------------------------
+
+class LLMGateway:
+    """Single entry point for chat-model calls: pooled clients, per-model limits, priorities."""
+
+    def __init__(
+        self,
+        default_limits: ModelLimits = ModelLimits(),
+        model_factory: ModelFactory = ollama_model_factory,
+    ) -> None:
+        self._default_limits = default_limits
+        self._model_factory = model_factory
+        self._limits: Dict[str, ModelLimits] = {}
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._models: Dict[Tuple[str, float], BaseChatModel] = {}
+        self._bound: Dict[Tuple[str, float, Optional[Type[BaseModel]]], Runnable] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: GraphConfig) -> "LLMGateway":
+        return cls(
+            default_limits=ModelLimits(
+                max_concurrency=cfg.llm_max_concurrency,
+                rate_per_s=cfg.llm_rate_per_s,
+                burst=cfg.llm_burst,
+                timeout_s=cfg.llm_timeout_s,
+                queue_timeout_s=cfg.llm_queue_timeout_s,
+            )
+        )
+
+    # ---- configuration ----
+
+    def configure(self, model: str, limits: Optional[ModelLimits]) -> None:
+        """Set a model's limits (None = back to the defaults); its lane is resized, its clients rebuilt."""
+        with self._lock:
+            if limits is None:
+                self._limits.pop(model, None)
+            else:
+                self._limits[model] = limits
+            lane = self._lanes.get(model)
+            if lane is not None:
+                lane.reconfigure(self._limits.get(model, self._default_limits))
+            self._drop_cached(model)
+
+    @contextmanager
+    def scoped_limits(self, model: str, limits: ModelLimits) -> Iterator[None]:
+        """Override a model's limits for the duration of a job; the previous limits are restored on exit."""
+        with self._lock:
+            previous = self._limits.get(model)
+        self.configure(model, limits)
+        try:
+            yield
+        finally:
+            self.configure(model, previous)
+
+    def limits(self, model: str) -> ModelLimits:
+        with self._lock:
+            return self._limits.get(model, self._default_limits)
+
+    def set_model_factory(self, factory: ModelFactory) -> None:
+        """Swap the backend (e.g. deterministic fakes for benchmarks); cached clients are dropped."""
+        with self._lock:
+            self._model_factory = factory
+            self._models.clear()
+            self._bound.clear()
+
+    def _drop_cached(self, model: str) -> None:
+        self._models = {k: v for k, v in self._models.items() if k[0] != model}
+        self._bound = {k: v for k, v in self._bound.items() if k[0] != model}
+
+    def _lane(self, model: str) -> _ModelLane:
+        with self._lock:
+            lane = self._lanes.get(model)
+            if lane is None:
+                lane = _ModelLane(self._limits.get(model, self._default_limits))
+                self._lanes[model] = lane
+            return lane
+
+    # ---- clients ----
+
+    def chat_model(self, model: str, temperature: float = 0) -> BaseChatModel:
+        """Shared (pooled) chat model instance; no admission control."""
+        key = (model, float(temperature))
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is None:
+                limits = self._limits.get(model, self._default_limits)
+                llm = self._model_factory(model, float(temperature), limits)
+                self._models[key] = llm
+            return llm
+
+    def _bound_runnable(self, model: str, temperature: float, schema: Optional[Type[BaseModel]]) -> Runnable:
+        key = (model, float(temperature), schema)
+        with self._lock:
+            bound = self._bound.get(key)
+        if bound is None:
+            llm = self.chat_model(model, temperature)
+            bound = llm.with_structured_output(schema) if schema is not None else llm
+            with self._lock:
+                self._bound[key] = bound
+        return bound
+
+    def runnable(
+        self,
+        model: str,
+        *,
+        temperature: float = 0,
+        schema: Optional[Type[BaseModel]] = None,
+        priority: Priority = Priority.GRADING,
+    ) -> Runnable:
+        """Runnable that admits each call through the model's queue before invoking the shared client."""
+
+        def _call(inputs: Any, config: RunnableConfig) -> Any:
+            return self.call(model, inputs, temperature=temperature, schema=schema, priority=priority, config=config)
+
+        name = f"gateway:{model}" + (f":{schema.__name__}" if schema is not None else "")
+        return RunnableLambda(_call, name=name)
+
+    def call(
+        self,
+        model: str,
+        inputs: Any,
+        *,
+        temperature: float = 0,
+        schema: Optional[Type[BaseModel]] = None,
+        priority: Priority = Priority.GRADING,
+        config: Optional[RunnableConfig] = None,
+    ) -> Any:
+        lane = self._lane(model)
+        m = lane.metrics
+        queued_at = time.monotonic()
+        deadline = queued_at + lane.limits.queue_timeout_s
+        labels = {"model": model, "priority": priority.name}
+
+        with tracer.span(f"llm:{schema.__name__ if schema is not None else 'chat'}", kind="llm", **labels) as sp:
+            with m.lock:
+                m.max_queue_depth = max(m.max_queue_depth, lane.slots.depth + 1)
+            metrics.set_gauge("rag_llm_queue_depth", lane.slots.depth + 1, help="Calls waiting for a model slot", model=model)
+
+            # Rate token first: waiting on the bucket while holding a slot would starve other callers
+            if not lane.bucket.acquire(deadline):
+                self._record_timeout(lane, labels)
+                raise GatewayTimeout(f"Timed out waiting for {model} rate limit ({lane.limits.rate_per_s}/s)")
+            if not lane.slots.acquire(priority, deadline):
+                self._record_timeout(lane, labels)
+                raise GatewayTimeout(f"Timed out waiting for a {model} slot ({lane.limits.queue_timeout_s}s)")
+
+            try:
+                started = time.monotonic()
+                queue_wait = started - queued_at
+                with m.lock:
+                    m.requests += 1
+                    m.in_flight += 1
+                    m.queue_wait_s.append(queue_wait)
+                    m.by_priority[priority.name] = m.by_priority.get(priority.name, 0) + 1
+                metrics.set_gauge("rag_llm_queue_depth", lane.slots.depth, help="Calls waiting for a model slot", model=model)
+
+                usage = UsageCallback()
+                status = "ok"
+                try:
+                    return self._bound_runnable(model, temperature, schema).invoke(inputs, config=with_callback(config, usage))
+                except Exception:
+                    status = "error"
+                    with m.lock:
+                        m.errors += 1
+                    raise
+                finally:
+                    latency = time.monotonic() - started
+                    with m.lock:
+                        m.in_flight -= 1
+                        m.latency_s.append(latency)
+                    sp.set(
+                        queue_wait_s=round(queue_wait, 6),
+                        latency_s=round(latency, 6),
+                        prompt_tokens=usage.prompt_tokens,
+                        completion_tokens=usage.completion_tokens,
+                        status=status,
+                    )
+                    metrics.inc("rag_llm_calls_total", help="LLM calls by outcome", status=status, **labels)
+                    metrics.observe("rag_llm_latency_seconds", latency, help="LLM call latency (excluding queue wait)", **labels)
+                    metrics.observe("rag_llm_queue_wait_seconds", queue_wait, help="Time spent waiting for a model slot", **labels)
+                    metrics.inc("rag_llm_tokens_total", usage.prompt_tokens, help="LLM tokens", model=model, direction="prompt")
+                    metrics.inc("rag_llm_tokens_total", usage.completion_tokens, help="LLM tokens", model=model, direction="completion")
+            finally:
+                lane.slots.release()
+
+    def _record_timeout(self, lane: _ModelLane, labels: Dict[str, str]) -> None:
+        with lane.metrics.lock:
+            lane.metrics.timeouts += 1
+        metrics.inc("rag_llm_calls_total", help="LLM calls by outcome", status="timeout", **labels)
+
+    # ---- metrics ----
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lanes = dict(self._lanes)
+        return {model: lane.metrics.snapshot(lane.slots.depth) for model, lane in lanes.items()}
+
+
+gateway = LLMGateway.from_config(config)
@@ -1,15 +1,22 @@
 from typing import Dict,Any
 from graph.state import GraphState
 from graph.chains.generate_chain import generate, extract_citation_numbers, strip_invalid_citations, format_sources_block
+from graph.chunks import as_refs
+from ingestion_retrival import expand_to_parents
 
 def generate_node(state : GraphState) -> Dict[str,Any]:
 
     question = state["question"]
-    documents = state["documents"]
+    # Graded child chunks are swapped for their parent sections (no-op for flat chunks)
+    documents = as_refs(expand_to_parents(state["documents"]))
     retries = state.get("retries", 0) + 1
 
-
-    answer = generate.invoke({"question": question, "documents": documents})
+    # A speculative draft is only valid for the first pass over the graded documents
+    draft = state.get("draft_generation")
+    if draft is not None and retries == 1:
+        answer = draft
+    else:
+        answer = generate.invoke({"question": question, "documents": documents})
 
     answer = strip_invalid_citations(answer, max_cite=len(documents))
     cited = extract_citation_numbers(answer)
@@ -17,4 +24,4 @@ def generate_node(state : GraphState) -> Dict[str,Any]:
     sources = format_sources_block(documents, cited)
     final_output = f"{answer}\n\n{sources}" if cited else answer
 
-    return {"question": question, "documents": documents, "generation": final_output, 'retries': retries}
+    return {"question": question, "documents": documents, "generation": final_output, 'retries': retries, "draft_generation": None}
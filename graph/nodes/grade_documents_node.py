@@ -1,27 +1,93 @@
-from typing import Any, Dict
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from graph.chains.retrieval_grader_chain import retrieval_grader
+from graph.chunks import ChunkRef, as_refs
+from graph.config import config
+from graph.speculation import resolve_speculation, start_speculation
 from graph.state import GraphState
+from graph.tracing import metrics
 
+logger = logging.getLogger(__name__)
 
-def grade_documents_node(state: GraphState) -> Dict[str, Any]:
 
-    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
-    question = state["question"]
-    documents = state.get("documents", [])
+def next_page(graded: int, relevant: int, available: int) -> int:
+    """Adaptive-k: how many more ranked candidates to grade (0 = stop)."""
+    if graded == 0:
+        size = config.adaptive_k_initial
+    elif relevant >= config.adaptive_k_enough:
+        return 0
+    else:
+        size = config.adaptive_k_step
+    return max(0, min(size, min(available, config.adaptive_k_max) - graded))
+
+
+@dataclass
+class GradingRun:
+    """Grading progress for one question: adaptive-k pages, or every candidate in one page."""
+    question: str
+    documents: List[ChunkRef]
+    relevant: List[ChunkRef] = field(default_factory=list)
+    graded: int = 0
 
-    filtered_docs = []
-    
+    def next_page(self) -> List[ChunkRef]:
+        if config.adaptive_k:
+            size = next_page(self.graded, len(self.relevant), len(self.documents))
+        else:
+            size = len(self.documents) - self.graded
+        return self.documents[self.graded:self.graded + size]
 
 
-    for d in documents:
-        score = retrieval_grader.invoke(
-            {"question": question, "document": d.page_content}
+def grade_runs(runs: List[GradingRun], max_concurrency: Optional[int] = None) -> None:
+    """Grade every run in rounds; each round is one grader batch over all runs still short of evidence."""
+    while True:
+        pages = [(run, run.next_page()) for run in runs]
+        pairs = [(run, d) for run, page in pages for d in page]
+        if not pairs:
+            break
+        scores = retrieval_grader.batch(
+            [{"question": run.question, "document": d.page_content} for run, d in pairs],
+            config={"max_concurrency": max_concurrency or len(pairs)},
         )
-        grade = score.binary_score
-        if grade.lower() == "yes":
-            print("---GRADE: DOCUMENT RELEVANT---")
-            filtered_docs.append(d)
+        for (run, d), s in zip(pairs, scores):
+            if s.binary_score.lower() == "yes":
+                run.relevant.append(d)
+        for run, page in pages:
+            run.graded += len(page)
+
+    if config.adaptive_k:
+        for run in runs:
+            metrics.observe("rag_adaptive_k_graded", run.graded, help="Candidates graded per question (adaptive-k)",
+                            buckets=(1, 2, 3, 4, 6, 8, 10, 12, 16, 24))
+
+
+def _is_relevant(question: str, d: ChunkRef) -> bool:
+    score = retrieval_grader.invoke({"question": question, "document": d.page_content})
+    return score.binary_score.lower() == "yes"
+
+
+def _grade_adaptive(question: str, documents: List[ChunkRef]) -> List[ChunkRef]:
+    run = GradingRun(question, documents)
+    grade_runs([run])
+    logger.info("adaptive-k graded %d/%d candidates, %d relevant", run.graded, len(documents), len(run.relevant))
+    return run.relevant
+
+
+def grade_documents_node(state: GraphState) -> Dict[str, Any]:
+
+    question = state["question"]
+    documents = as_refs(state.get("documents", []))
+
+    # Optionally draft an answer on the top-ranked chunks while grading runs
+    speculated = documents[:config.adaptive_k_initial] if config.adaptive_k else documents
+    draft = start_speculation(question, speculated) if config.speculative_generation else None
 
+    if config.adaptive_k:
+        filtered_docs = _grade_adaptive(question, documents)
+    else:
+        filtered_docs = [d for d in documents if _is_relevant(question, d)]
+        logger.info("graded %d/%d documents relevant", len(filtered_docs), len(documents))
 
+    draft_generation = resolve_speculation(draft, filtered_docs)
 
-    return {"documents": filtered_docs, "question": question,"document_relevancy":bool(filtered_docs)}
\ No newline at end of file
+    return {"documents": filtered_docs, "question": question,"document_relevancy":bool(filtered_docs), "draft_generation": draft_generation}
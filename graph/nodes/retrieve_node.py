@@ -1,15 +1,20 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+from graph.chunks import as_refs
+from graph.config import config
 from graph.state import GraphState
-from ingestion_retrival import retriever
+from ingestion_retrival import get_retriever, search_by_vector_with_scores, search_with_scores
 
 
 
-def retrieve_node(state: GraphState) -> Dict[str,Any]:
-    print("---RETRIVE DATA FROM VECTORSTORE---")
-
+def retrieve_node(state: GraphState, query_embedding: Optional[List[float]] = None) -> Dict[str,Any]:
+    """Batch mode passes a pre-computed query_embedding so a window of questions is embedded in one call."""
     question = state["question"]
-    documents = retriever.invoke(question)
+    # Adaptive-k fetches the whole candidate ranking once; grading decides how deep to go
+    k = config.adaptive_k_max if config.adaptive_k else None
+    if query_embedding is None:
+        hits = search_with_scores(get_retriever(), question, k=k)
+    else:
+        hits = search_by_vector_with_scores(get_retriever(), query_embedding, k=k)
+    documents = as_refs([d for d, _ in hits], [score for _, score in hits])
 
     return {'question':question,'documents':documents}
-
-
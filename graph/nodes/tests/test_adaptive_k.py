@@ -0,0 +1,51 @@
+import importlib
+from dataclasses import replace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.chains.retrieval_grader_chain import GradeDocuments
+
+grade_module = importlib.import_module("graph.nodes.grade_documents_node")
+
+
+def _docs(n):
+    return [Document(id=f"a{i}", page_content=f"candidate {i}", metadata={"page_start": i}) for i in range(n)]
+
+
+@pytest.fixture
+def grade_with(monkeypatch):
+    monkeypatch.setattr(
+        grade_module,
+        "config",
+        replace(grade_module.config, adaptive_k=True, adaptive_k_initial=3, adaptive_k_step=3,
+                adaptive_k_max=9, adaptive_k_enough=2, speculative_generation=False),
+    )
+
+    def _set(relevant):
+        seen = []
+
+        def grade(x):
+            seen.append(x["document"])
+            return GradeDocuments(binary_score="yes" if x["document"] in relevant else "no")
+
+        monkeypatch.setattr(grade_module, "retrieval_grader", RunnableLambda(grade))
+        return seen
+
+    return _set
+
+
+def test_stops_after_first_page_when_enough_pass(grade_with) -> None:
+    seen = grade_with({"candidate 0", "candidate 2"})
+    out = grade_module.grade_documents_node({"question": "q", "documents": _docs(12)})
+    assert [d.id for d in out["documents"]] == ["a0", "a2"]
+    assert len(seen) == 3
+
+
+def test_pages_deeper_up_to_the_cap(grade_with) -> None:
+    seen = grade_with({"candidate 7", "candidate 10"})
+    out = grade_module.grade_documents_node({"question": "q", "documents": _docs(12)})
+    # a10 lies beyond adaptive_k_max=9, so only a7 is found before the search gives up
+    assert [d.id for d in out["documents"]] == ["a7"]
+    assert len(seen) == 9 and out["document_relevancy"] is True
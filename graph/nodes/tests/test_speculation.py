@@ -0,0 +1,77 @@
+import importlib
+from dataclasses import replace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+import graph.speculation as speculation
+from graph.chains.retrieval_grader_chain import GradeDocuments
+
+# graph.nodes re-exports the node functions under their module names
+generate_module = importlib.import_module("graph.nodes.generate_node")
+grade_module = importlib.import_module("graph.nodes.grade_documents_node")
+
+
+def _docs():
+    return [
+        Document(id=f"d{i}", page_content=f"chunk {i}", metadata={"source": "a.pdf", "page_start": i})
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    calls = {"generate": 0, "draft": 0, "generated_on": []}
+
+    def _generate(inputs):
+        calls["generate"] += 1
+        calls["generated_on"].append([d.page_content for d in inputs["documents"]])
+        return "Draft answer [1]."
+
+    def _draft(inputs):
+        calls["draft"] += 1
+        return "Draft answer [1]."
+
+    def _grade(relevant):
+        return RunnableLambda(
+            lambda x: GradeDocuments(binary_score="yes" if x["document"] in relevant else "no")
+        )
+
+    monkeypatch.setattr(speculation, "speculative_generate", RunnableLambda(_draft))
+    monkeypatch.setattr(generate_module, "generate", RunnableLambda(_generate))
+    monkeypatch.setattr(grade_module, "config", replace(grade_module.config, speculative_generation=True))
+    speculation.speculation_stats.reset()
+    return calls, lambda relevant: monkeypatch.setattr(grade_module, "retrieval_grader", _grade(relevant))
+
+
+def test_speculation_hit_reuses_draft(fakes) -> None:
+    calls, set_relevant = fakes
+    set_relevant({"chunk 0", "chunk 1", "chunk 2"})
+
+    graded = grade_module.grade_documents_node({"question": "q", "documents": _docs()})
+    assert graded["draft_generation"] == "Draft answer [1]."
+
+    out = generate_module.generate_node({**graded, "retries": 0})
+    assert out["generation"].startswith("Draft answer [1].")
+    assert calls["generate"] == 0 and calls["draft"] == 1
+
+    stats = speculation.speculation_stats.snapshot()
+    assert stats["hits"] == 1 and stats["hit_rate"] == 1.0
+
+
+def test_speculation_miss_regenerates(fakes) -> None:
+    calls, set_relevant = fakes
+    set_relevant({"chunk 0"})
+
+    graded = grade_module.grade_documents_node({"question": "q", "documents": _docs()})
+    assert graded["draft_generation"] is None
+    assert len(graded["documents"]) == 1
+
+    generate_module.generate_node({**graded, "retries": 0})
+    stats = speculation.speculation_stats.snapshot()
+    assert stats["misses"] == 1 and stats["hit_rate"] == 0.0
+    # The discarded draft (if it had started) never counts; exactly one real generation on the graded set
+    assert calls["draft"] <= 1
+    assert calls["generate"] == 1
+    assert calls["generated_on"] == [["chunk 0"]]
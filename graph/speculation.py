@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from graph.chains.generate_chain import speculative_generate
+from graph.chunks import ChunkRef, chunk_key
+from graph.config import config
+from graph.tracing import metrics
+from ingestion_retrival import expand_to_parents
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Speculation Stats
+# -----------------------------
+
+class SpeculationStats:
+    """Process-wide counters for speculative generation (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.attempts = 0
+            self.hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.latency_saved_s = 0.0
+            self.wasted_generation_s = 0.0
+
+    def record_hit(self, saved_s: float) -> None:
+        with self._lock:
+            self.attempts += 1
+            self.hits += 1
+            self.latency_saved_s += max(0.0, saved_s)
+
+    def record_miss(self, wasted_s: float, error: bool = False) -> None:
+        with self._lock:
+            self.attempts += 1
+            self.misses += 1
+            self.errors += int(error)
+            self.wasted_generation_s += max(0.0, wasted_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            hit_rate = self.hits / self.attempts if self.attempts else 0.0
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": round(hit_rate, 4),
+                "latency_saved_s": round(self.latency_saved_s, 4),
+                "avg_latency_saved_s": round(self.latency_saved_s / self.hits, 4) if self.hits else 0.0,
+                "wasted_generation_s": round(self.wasted_generation_s, 4),
+            }
+
+
+speculation_stats = SpeculationStats()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, config.speculative_workers),
+                thread_name_prefix="speculative-generate",
+            )
+        return _executor
+
+
+# -----------------------------
+# Draft Lifecycle
+# -----------------------------
+
+doc_key = chunk_key
+
+
+@dataclass
+class SpeculativeDraft:
+    keys: Tuple[str, ...]
+    started_at: float
+    future: Optional[Future] = None
+    finished_at: Optional[float] = None
+
+
+def start_speculation(question: str, documents: Sequence[ChunkRef]) -> Optional[SpeculativeDraft]:
+    top_n = config.speculative_top_n
+    speculated = list(documents[:top_n] if top_n > 0 else documents)
+    if not speculated:
+        return None
+
+    draft = SpeculativeDraft(
+        keys=tuple(doc_key(d) for d in speculated),
+        started_at=time.perf_counter(),
+    )
+
+    def _run() -> str:
+        try:
+            # Same parent context generate_node will build, so citation numbers line up on a hit
+            return speculative_generate.invoke({"question": question, "documents": expand_to_parents(speculated)})
+        finally:
+            draft.finished_at = time.perf_counter()
+
+    # Copy the context so the draft's LLM span lands in the caller's trace
+    draft.future = _get_executor().submit(contextvars.copy_context().run, _run)
+    return draft
+
+
+def resolve_speculation(draft: Optional[SpeculativeDraft], graded: List[ChunkRef]) -> Optional[str]:
+    """Return the draft answer if the graded set matches the speculated set, else cancel it."""
+    if draft is None:
+        return None
+
+    if tuple(doc_key(d) for d in graded) != draft.keys:
+        # Not-yet-started drafts are dropped; running ones finish in the background (at SPECULATIVE
+        # priority, behind grading and the real generation) and are discarded
+        draft.future.cancel()
+        finished = draft.finished_at or time.perf_counter()
+        speculation_stats.record_miss(finished - draft.started_at)
+        metrics.inc("rag_speculation_total", help="Speculative drafts by outcome", outcome="miss")
+        logger.info("speculation miss: graded set differs, draft discarded")
+        return None
+
+    graded_at = time.perf_counter()
+    try:
+        answer = draft.future.result()
+    except Exception:
+        speculation_stats.record_miss(time.perf_counter() - draft.started_at, error=True)
+        metrics.inc("rag_speculation_total", help="Speculative drafts by outcome", outcome="error")
+        logger.warning("speculative draft failed; regenerating", exc_info=True)
+        return None
+
+    # Generation time that overlapped grading is latency the user no longer waits for
+    finished = draft.finished_at or time.perf_counter()
+    overlapped = min(finished, graded_at) - draft.started_at
+    speculation_stats.record_hit(overlapped)
+    metrics.inc("rag_speculation_total", help="Speculative drafts by outcome", outcome="hit")
+    metrics.inc("rag_speculation_latency_saved_seconds_total", overlapped, help="Generation time overlapped with grading")
+    logger.info("speculation hit: reusing draft (%.3fs overlapped)", overlapped)
+    return answer
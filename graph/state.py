@@ -1,11 +1,12 @@
-from typing import TypedDict, List
-from langchain_core.documents import Document
+from typing import TypedDict, List, Optional
+from graph.chunks import ChunkRef
 
 class GraphState(TypedDict, total=False):
     question : str
     generation : str
     document_relevancy : bool
-    documents : List[Document]
+    documents : List[ChunkRef]  # text lives once in graph.chunks.chunk_store
     retries: int
+    draft_generation: Optional[str]
 
-    
\ No newline at end of file
+    
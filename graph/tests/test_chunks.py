@@ -0,0 +1,70 @@
+import pytest
+from langchain_core.documents import Document
+
+import graph.chunks as chunks
+from graph.chunks import ChunkRef, ChunkStore, StaleChunkError, as_refs, resolve
+
+
+@pytest.fixture
+def store(monkeypatch):
+    backing = {
+        f"c{i}": Document(id=f"c{i}", page_content=f"text {i}", metadata={"page_start": i, "content_hash": f"h{i}"})
+        for i in range(3)
+    }
+    loads = []
+
+    def loader(ids):
+        loads.append(list(ids))
+        return [backing[i] for i in ids if i in backing]
+
+    store = ChunkStore(capacity=2, loader=loader)
+    monkeypatch.setattr(chunks, "chunk_store", store)
+    return store, backing, loads
+
+
+def test_refs_share_one_copy_and_reload_after_eviction(store) -> None:
+    store, backing, loads = store
+    first = as_refs([backing["c0"]], [0.25])[0]
+    again = as_refs([Document(id="c0", page_content="text 0", metadata={"page_start": 0})])[0]
+
+    assert first == ChunkRef(id="c0", score=0.25, content_hash="h0")
+    assert not hasattr(first, "__dict__")  # slotted
+    assert first.page_content is again.page_content
+    assert first.metadata["page_start"] == 0
+    with pytest.raises(TypeError):
+        first.metadata["page_start"] = 9  # read-only view
+
+    as_refs([backing["c1"], backing["c2"]])  # capacity 2 evicts c0
+    assert len(store) == 2 and store.evictions == 1
+    assert first.page_content == "text 0" and loads == [["c0"]]
+    assert resolve([first])[0] == Document(id="c0", page_content="text 0", metadata={"page_start": 0, "content_hash": "h0"})
+
+    with pytest.raises(KeyError):
+        ChunkRef(id="missing").page_content
+
+
+def test_reingested_chunk_replaces_stale_copy(store) -> None:
+    store, _, _ = store
+    old = as_refs([Document(id="x", page_content="old text", metadata={"content_hash": "h1"})])[0]
+    new = as_refs([Document(id="x", page_content="NEW text", metadata={"content_hash": "h2"})])[0]
+
+    assert new == ChunkRef(id="x", content_hash="h2")
+    assert new.page_content == "NEW text" and new.metadata["content_hash"] == "h2"
+    assert len(store) == 1
+    # A ref taken before the re-ingest never reads (and cites) text it was not graded on
+    with pytest.raises(StaleChunkError):
+        old.page_content
+
+    # Without a content_hash the text itself decides
+    as_refs([Document(id="y", page_content="before")])
+    assert as_refs([Document(id="y", page_content="after")])[0].page_content == "after"
+
+
+def test_ref_reloads_its_own_version_by_hash(store) -> None:
+    store, backing, loads = store
+    ref = as_refs([backing["c0"]])[0]
+    as_refs([Document(id="c0", page_content="other copy", metadata={"content_hash": "hX"})])
+
+    # The stored copy has another hash; the backing store still holds the ref's version
+    assert ref.page_content == "text 0" and loads == [["c0"]]
+    assert store.entry("c0")[1]["content_hash"] == "h0"
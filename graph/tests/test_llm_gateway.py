@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from graph.llm_gateway import GatewayTimeout, LLMGateway, ModelLimits, Priority
+
+
+class _SlowFake(FakeListChatModel):
+    sleep: float = 0.05
+
+
+def _gateway(limits: ModelLimits) -> LLMGateway:
+    return LLMGateway(default_limits=limits, model_factory=lambda model, temperature, lim: _SlowFake(responses=["ok"]))
+
+
+def test_gateway_shares_client_per_model() -> None:
+    gw = _gateway(ModelLimits())
+    assert gw.chat_model("m") is gw.chat_model("m")
+    assert gw.chat_model("m") is not gw.chat_model("other")
+
+
+def test_gateway_caps_concurrency() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=2))
+    llm = gw.runnable("m", priority=Priority.GRADING)
+
+    threads = [threading.Thread(target=llm.invoke, args=("hi",)) for _ in range(6)]
+    peak = 0
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        peak = max(peak, gw.metrics().get("m", {}).get("in_flight", 0))
+        time.sleep(0.005)
+
+    snap = gw.metrics()["m"]
+    assert peak <= 2
+    assert snap["requests"] == 6 and snap["in_flight"] == 0
+
+
+def test_gateway_serves_generation_before_grading() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=1))
+    order = []
+
+    def run(priority: Priority) -> None:
+        gw.runnable("m", priority=priority).invoke("hi")
+        order.append(priority)
+
+    blocker = threading.Thread(target=run, args=(Priority.GRADING,))
+    blocker.start()
+    time.sleep(0.01)  # blocker holds the only slot
+
+    grading = threading.Thread(target=run, args=(Priority.GRADING,))
+    grading.start()
+    time.sleep(0.01)
+    generation = threading.Thread(target=run, args=(Priority.GENERATION,))
+    generation.start()
+
+    for t in (blocker, grading, generation):
+        t.join()
+    assert order == [Priority.GRADING, Priority.GENERATION, Priority.GRADING]
+
+
+def test_gateway_serves_speculative_drafts_last() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=1))
+    order = []
+
+    def run(priority: Priority) -> None:
+        gw.runnable("m", priority=priority).invoke("hi")
+        order.append(priority)
+
+    blocker = threading.Thread(target=run, args=(Priority.GRADING,))
+    blocker.start()
+    time.sleep(0.01)
+
+    waiting = []
+    for priority in (Priority.SPECULATIVE, Priority.GRADING, Priority.GENERATION):
+        waiting.append(threading.Thread(target=run, args=(priority,)))
+        waiting[-1].start()
+        time.sleep(0.01)
+
+    for t in [blocker, *waiting]:
+        t.join()
+    assert order == [Priority.GRADING, Priority.GENERATION, Priority.GRADING, Priority.SPECULATIVE]
+
+
+def test_gateway_queue_timeout() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=1, queue_timeout_s=0.01))
+    blocker = threading.Thread(target=gw.runnable("m").invoke, args=("hi",))
+    blocker.start()
+    time.sleep(0.005)
+
+    with pytest.raises(GatewayTimeout):
+        gw.runnable("m").invoke("hi")
+    blocker.join()
+    assert gw.metrics()["m"]["timeouts"] == 1
+
+
+def test_scoped_limits_restore_previous_limits() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=2))
+    gw.configure("pinned", ModelLimits(max_concurrency=3))
+
+    with gw.scoped_limits("m", ModelLimits(max_concurrency=8)), gw.scoped_limits("pinned", ModelLimits(max_concurrency=9)):
+        assert gw.limits("m").max_concurrency == 8 and gw.limits("pinned").max_concurrency == 9
+    assert gw.limits("m") == ModelLimits(max_concurrency=2)
+    assert gw.limits("pinned") == ModelLimits(max_concurrency=3)
+
+
+def test_configure_resizes_the_lane_in_flight() -> None:
+    release = threading.Event()
+    running, peak, lock = [0], [0], threading.Lock()
+
+    class _Blocking(FakeListChatModel):
+        def _call(self, *args, **kwargs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            release.wait(5)
+            with lock:
+                running[0] -= 1
+            return "ok"
+
+    gw = LLMGateway(default_limits=ModelLimits(max_concurrency=2), model_factory=lambda *a: _Blocking(responses=["ok"]))
+    llm = gw.runnable("m")
+    first = [threading.Thread(target=llm.invoke, args=("hi",)) for _ in range(2)]
+    for t in first:
+        t.start()
+    while gw.metrics().get("m", {}).get("in_flight", 0) < 2:
+        time.sleep(0.002)
+
+    # Shrinking while both calls run: the new cap must hold until they drain
+    gw.configure("m", ModelLimits(max_concurrency=1))
+    later = [threading.Thread(target=llm.invoke, args=("hi",)) for _ in range(2)]
+    for t in later:
+        t.start()
+    time.sleep(0.05)
+    assert gw.metrics()["m"]["queue_depth"] == 2 and peak[0] == 2
+
+    release.set()
+    for t in first + later:
+        t.join()
+    assert gw.metrics()["m"]["requests"] == 4  # one lane, so the metrics survive the resize
+
+
+def test_rate_limited_callers_do_not_hold_slots() -> None:
+    gw = _gateway(ModelLimits(max_concurrency=1, rate_per_s=5, burst=1, queue_timeout_s=1.0))
+    llm = gw.runnable("m")
+    llm.invoke("hi")  # drains the bucket
+
+    # The next caller waits ~200ms for a token; meanwhile the only slot stays free
+    waiter = threading.Thread(target=llm.invoke, args=("hi",))
+    waiter.start()
+    time.sleep(0.02)
+    slots = gw._lane("m").slots
+    assert slots.acquire(Priority.GENERATION, time.monotonic() + 0.01)
+    slots.release()
+    waiter.join()
+    assert gw.metrics()["m"]["requests"] == 2
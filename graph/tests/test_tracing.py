@@ -0,0 +1,49 @@
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from graph.llm_gateway import LLMGateway, ModelLimits
+from graph.tracing import JsonlSink, MetricsRegistry, metrics, traced_node, tracer
+
+
+def test_trace_collects_node_llm_spans_and_route(tmp_path) -> None:
+    gw = LLMGateway(ModelLimits(), model_factory=lambda m, t, l: FakeListChatModel(responses=["ok"]))
+    llm = gw.runnable("fake")
+
+    def node(state):
+        llm.invoke(state["question"])
+        return {"question": state["question"], "retries": 1}
+
+    sink = JsonlSink(tmp_path / "traces.jsonl")
+    tracer.add_sink(sink)
+    try:
+        with tracer.trace("test", question="q"):
+            traced_node("generate_node", node)({"question": "q"})
+            tracer.record_route("generate_node", "end")
+    finally:
+        tracer.remove_sink(sink)
+
+    record = json.loads((tmp_path / "traces.jsonl").read_text().strip())
+    assert record["routes"] == ["end"]
+    assert record["attributes"]["retries"] == 1
+    assert record["llm_calls"] == 1
+
+    spans = {s["name"]: s for s in record["spans"]}
+    assert spans["llm:chat"]["parent_id"] == spans["generate_node"]["span_id"]
+    assert spans["llm:chat"]["attributes"]["model"] == "fake"
+    assert 'rag_route_total{route="end",source="generate_node"}' in metrics.render_prometheus()
+
+
+def test_prometheus_histogram_rendering() -> None:
+    reg = MetricsRegistry()
+    reg.observe("lat_seconds", 0.2, help="Latency", buckets=(0.1, 1.0), node="a")
+    reg.observe("lat_seconds", 5.0, buckets=(0.1, 1.0), node="a")
+    reg.inc("calls_total", node="a")
+
+    text = reg.render_prometheus()
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{node="a",le="0.1"} 0' in text
+    assert 'lat_seconds_bucket{node="a",le="1"} 1' in text
+    assert 'lat_seconds_bucket{node="a",le="+Inf"} 2' in text
+    assert 'lat_seconds_count{node="a"} 2' in text
+    assert 'calls_total{node="a"} 1' in text
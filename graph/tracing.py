@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.outputs import LLMResult
+
+from graph.config import config
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# -----------------------------
+# Metrics Registry
+# -----------------------------
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+@dataclass
+class _Histogram:
+    buckets: Tuple[float, ...]
+    counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms with Prometheus text rendering."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters: Dict[str, Dict[LabelKey, float]] = {}
+            self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+            self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+            self._help: Dict[str, str] = {}
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels: Any) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0.0) + value
+            self._help.setdefault(name, help)
+
+    def set_gauge(self, name: str, value: float, help: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+            self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels: Any) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _labels(labels)
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(buckets)
+            hist.observe(value)
+            self._help.setdefault(name, help)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {n: [{"labels": dict(k), "value": v} for k, v in s.items()] for n, s in self._counters.items()},
+                "gauges": {n: [{"labels": dict(k), "value": v} for k, v in s.items()] for n, s in self._gauges.items()},
+                "histograms": {
+                    n: [
+                        {
+                            "labels": dict(k),
+                            "count": h.count,
+                            "sum": h.total,
+                            "buckets": dict(zip((str(b) for b in h.buckets), h.counts)),
+                        }
+                        for k, h in s.items()
+                    ]
+                    for n, s in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    if self._help.get(name):
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in sorted(series.items()):
+                        lines.append(f"{name}{_fmt_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                if self._help.get(name):
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(series.items()):
+                    for upper, c in zip(h.buckets, h.counts):
+                        lines.append(f"{name}_bucket{_fmt_labels(key, ('le', f'{upper:g}'))} {c}")
+                    lines.append(f"{name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"{name}_sum{_fmt_labels(key)} {h.total:g}")
+                    lines.append(f"{name}_count{_fmt_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path: Path) -> None:
+        record = {"ts": time.time(), "metrics": self.snapshot()}
+        with Path(path).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+metrics = MetricsRegistry()
+
+
+# -----------------------------
+# Spans + Traces
+# -----------------------------
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: Optional[str]
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start)
+
+    def set(self, **attrs: Any) -> None:
+        self.attributes.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_s": round(self.duration_s, 6),
+            "attributes": self.attributes,
+        }
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    name: str
+    start: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    routes: List[str] = field(default_factory=list)
+    end: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        llm = [s for s in spans if s.kind == "llm"]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_s": round(((self.end or time.perf_counter()) - self.start), 6),
+            "attributes": self.attributes,
+            "routes": list(self.routes),
+            "llm_calls": len(llm),
+            "prompt_tokens": sum(int(s.attributes.get("prompt_tokens", 0)) for s in llm),
+            "completion_tokens": sum(int(s.attributes.get("completion_tokens", 0)) for s in llm),
+            "spans": [s.to_dict() for s in spans],
+        }
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("rag_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("rag_span", default=None)
+
+
+class JsonlSink:
+    """Appends one JSON line per finished trace."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, trace: Trace) -> None:
+        line = json.dumps(trace.summary(), default=str)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self._sinks: List[Callable[[Trace], None]] = []
+
+    def add_sink(self, sink: Callable[[Trace], None]) -> None:
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[Trace], None]) -> None:
+        self._sinks.remove(sink)
+
+    def current_trace(self) -> Optional[Trace]:
+        return _current_trace.get()
+
+    @contextmanager
+    def trace(self, name: str = "graph", **attrs: Any) -> Iterator[Trace]:
+        """Root a request: every node / LLM span opened inside attaches to this trace."""
+        tr = Trace(trace_id=uuid.uuid4().hex, name=name, start=time.perf_counter(), attributes=dict(attrs))
+        t_token = _current_trace.set(tr)
+        s_token = _current_span.set(None)
+        status = "ok"
+        try:
+            yield tr
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            _current_span.reset(s_token)
+            _current_trace.reset(t_token)
+            tr.end = time.perf_counter()
+            tr.attributes["status"] = status
+            metrics.observe("rag_graph_latency_seconds", tr.end - tr.start, help="End-to-end graph latency", status=status)
+            for sink in list(self._sinks):
+                try:
+                    sink(tr)
+                except Exception:
+                    logger.exception("trace sink failed")
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs: Any) -> Iterator[Span]:
+        tr = _current_trace.get()
+        parent = _current_span.get()
+        sp = Span(
+            name=name,
+            kind=kind,
+            trace_id=tr.trace_id if tr else None,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.perf_counter(),
+            attributes=dict(attrs),
+        )
+        token = _current_span.set(sp)
+        try:
+            yield sp
+        except BaseException as e:
+            sp.set(error=repr(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            sp.end = time.perf_counter()
+            if tr is not None:
+                tr.add(sp)
+
+    def record_route(self, source: str, route: str) -> None:
+        metrics.inc("rag_route_total", help="Conditional-edge decisions", source=source, route=route)
+        tr = _current_trace.get()
+        if tr is not None:
+            tr.routes.append(route)
+            tr.attributes["route"] = route
+        logger.info("route %s -> %s", source, route)
+
+
+tracer = Tracer()
+
+
+# -----------------------------
+# Node + LLM Instrumentation
+# -----------------------------
+
+def traced_node(name: str, fn: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        status = "ok"
+        with tracer.span(name, kind="node") as sp:
+            try:
+                out = fn(state, *args, **kwargs)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                metrics.observe("rag_node_latency_seconds", sp.duration_s, help="Graph node latency", node=name, status=status)
+            if isinstance(out, dict) and "retries" in out:
+                sp.set(retries=out["retries"])
+                tr = _current_trace.get()
+                if tr is not None:
+                    tr.attributes["retries"] = out["retries"]
+            if isinstance(out, dict) and "documents" in out:
+                sp.set(documents=len(out["documents"] or []))
+            return out
+
+    return wrapper
+
+
+class UsageCallback(BaseCallbackHandler):
+    """Collects prompt/completion token counts reported by the chat model."""
+
+    def __init__(self) -> None:
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for gens in response.generations:
+            for g in gens:
+                usage = getattr(getattr(g, "message", None), "usage_metadata", None) or {}
+                self.prompt_tokens += int(usage.get("input_tokens", 0) or 0)
+                self.completion_tokens += int(usage.get("output_tokens", 0) or 0)
+
+
+def with_callback(run_config: Optional[Dict[str, Any]], handler: BaseCallbackHandler) -> Dict[str, Any]:
+    cfg = dict(run_config or {})
+    callbacks = cfg.get("callbacks")
+    if callbacks is None:
+        cfg["callbacks"] = [handler]
+    elif isinstance(callbacks, BaseCallbackManager):
+        manager = callbacks.copy()
+        manager.add_handler(handler, inherit=True)
+        cfg["callbacks"] = manager
+    else:
+        cfg["callbacks"] = list(callbacks) + [handler]
+    return cfg
+
+
+# -----------------------------
+# Exporters
+# -----------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 (http.server API)
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve Prometheus text format on http://host:port/metrics from a daemon thread."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="rag-metrics", daemon=True).start()
+    return _server
+
+
+if config.trace_jsonl_path:
+    tracer.add_sink(JsonlSink(Path(config.trace_jsonl_path)))
@@ -1,20 +1,28 @@
 from __future__ import annotations
 
+import argparse
 import hashlib
 import json
-import re
-from collections import Counter, defaultdict
+import os
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import chromadb
+import numpy as np
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from docstore import ParentDocstore
+from store_layout import DOCSTORE_PATH, bump_generation, doc_index_name, shard_collection_name, shard_for_doc
+from text_cleaning import clean_pages
+
 
 # -----------------------------
 # Configuration
@@ -31,6 +39,17 @@ class IngestionConfig:
     chunk_size_tokens: int = 1800
     chunk_overlap_tokens: int = 100
     max_chunk_chars: int = 2000
+    token_counter: str = "tiktoken"  # "tiktoken" or "chars" (~4 chars/token, no encoder download)
+
+    # Sharding: chunks are split across N collections by doc_id hash
+    num_shards: int = 1
+
+    # Parent-child: embed small child chunks, keep the chunks above as parents in a docstore
+    parent_child: bool = False
+    child_chunk_size_tokens: int = 250
+    child_chunk_overlap_tokens: int = 30
+    max_child_chunk_chars: int = 600
+    docstore_path: Path = Path(DOCSTORE_PATH)
 
     # Header/footer removal (repeated lines across pages)
     header_footer_window_lines: int = 3
@@ -39,6 +58,15 @@ class IngestionConfig:
 
     manifest_path: Path = Path("./ingestion_manifest.json")
 
+    # Document-level index ({collection}-docs): centroid embedding + title/first page per doc_id
+    doc_index: bool = True
+    doc_summary_chars: int = 1500
+
+    # Crash safety: upsert in batches, checkpoint after each; atomic builds into a staging collection
+    upsert_batch_size: int = 256
+    checkpoint_path: Optional[Path] = None  # default: next to the manifest
+    atomic: bool = False
+
 
 # -----------------------------
 # Utilities
@@ -48,20 +76,6 @@ def _sha1(text: str) -> str:
     return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
 
 
-def _normalize_text(text: str) -> str:
-    # Remove soft hyphen
-    text = text.replace("\u00ad", "")
-
-    # De-hyphenate common PDF line breaks: "inter-\nnational" -> "international"
-    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
-
-    # Clean whitespace/newlines
-    text = re.sub(r"[ \t]+\n", "\n", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"[ \t]{2,}", " ", text)
-    return text.strip()
-
-
 # -----------------------------
 # PDF Loading (PyMuPDF first, pdfplumber fallback)
 # -----------------------------
@@ -92,36 +106,6 @@ def _load_pdf_pages(pdf_path: Path) -> List[Document]:
     return docs
 
 
-# -----------------------------
-# Header/Footer Removal (Optional but recommended)
-# -----------------------------
-
-def _collect_repeated_lines(pages: List[str], cfg: IngestionConfig) -> set[str]:
-    candidates: List[str] = []
-    w = cfg.header_footer_window_lines
-
-    for t in pages:
-        lines = [ln.strip() for ln in t.splitlines()]
-        head = [ln for ln in lines[:w] if len(ln) >= cfg.repeat_line_min_len]
-        tail = [ln for ln in lines[-w:] if len(ln) >= cfg.repeat_line_min_len]
-        candidates.extend(head)
-        candidates.extend(tail)
-
-    counts = Counter(candidates)
-    threshold = max(2, int(len(pages) * cfg.repeat_line_ratio))
-    return {ln for ln, c in counts.items() if c >= threshold}
-
-
-def _strip_repeated_lines(page_text: str, repeated: set[str]) -> str:
-    out: List[str] = []
-    for ln in page_text.splitlines():
-        s = ln.strip()
-        if s and s in repeated:
-            continue
-        out.append(ln)
-    return "\n".join(out)
-
-
 # -----------------------------
 # Cleaning + Metadata Enrichment
 # -----------------------------
@@ -129,18 +113,17 @@ def _strip_repeated_lines(page_text: str, repeated: set[str]) -> str:
 def _prepare_docs(pdf_path: Path, cfg: IngestionConfig) -> List[Document]:
     # Load per-page documents (keeps page metadata for citations)
     pages = _load_pdf_pages(pdf_path)
-    raw_texts = [p.page_content or "" for p in pages]
 
-    # Remove repeating header/footer lines when we have enough pages to detect patterns
-    repeated = _collect_repeated_lines(raw_texts, cfg) if len(raw_texts) >= 3 else set()
+    # Remove repeating header/footer lines (one sweep per document), then normalize each page
+    texts = clean_pages(
+        [p.page_content or "" for p in pages],
+        cfg.header_footer_window_lines,
+        cfg.repeat_line_min_len,
+        cfg.repeat_line_ratio,
+    )
 
     cleaned: List[Document] = []
-    for p in pages:
-        text = p.page_content or ""
-        if repeated:
-            text = _strip_repeated_lines(text, repeated)
-        text = _normalize_text(text)
-
+    for p, text in zip(pages, texts):
         meta = dict(p.metadata or {})
         meta["source"] = pdf_path.name
         meta["source_path"] = str(pdf_path.as_posix())
@@ -184,13 +167,27 @@ def _enforce_max_chars(docs: List[Document], max_chars: int) -> List[Document]:
     return out
 
 
+CHARS_PER_TOKEN = 4
+
+
+def _make_splitter(cfg: IngestionConfig, size_tokens: int, overlap_tokens: int) -> RecursiveCharacterTextSplitter:
+    separators = ["\n\n", "\n", ". ", " ", ""]
+    if cfg.token_counter == "chars":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=size_tokens * CHARS_PER_TOKEN,
+            chunk_overlap=overlap_tokens * CHARS_PER_TOKEN,
+            separators=separators,
+        )
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=size_tokens,
+        chunk_overlap=overlap_tokens,
+        separators=separators,
+    )
+
+
 def _split_and_tag(docs: List[Document], cfg: IngestionConfig) -> Tuple[List[Document], List[str]]:
     # Token-based split (approximation). We'll also enforce a hard char cap afterward.
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=cfg.chunk_size_tokens,
-        chunk_overlap=cfg.chunk_overlap_tokens,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
+    splitter = _make_splitter(cfg, cfg.chunk_size_tokens, cfg.chunk_overlap_tokens)
 
     splits = splitter.split_documents(docs)
     splits = _enforce_max_chars(splits, max_chars=cfg.max_chunk_chars)
@@ -233,11 +230,259 @@ def _split_and_tag(docs: List[Document], cfg: IngestionConfig) -> Tuple[List[Doc
     return splits, ids
 
 
+def _split_children(
+    parents: List[Document], parent_ids: List[str], cfg: IngestionConfig
+) -> Tuple[List[Document], List[str]]:
+    # Children inherit the parent's citation metadata, so page numbers survive the split
+    splitter = _make_splitter(cfg, cfg.child_chunk_size_tokens, cfg.child_chunk_overlap_tokens)
+    children: List[Document] = []
+    ids: List[str] = []
+
+    for parent, parent_id in zip(parents, parent_ids):
+        pieces = [Document(page_content=t, metadata=parent.metadata) for t in splitter.split_text(parent.page_content)]
+        for n, piece in enumerate(_enforce_max_chars(pieces, max_chars=cfg.max_child_chunk_chars)):
+            meta = dict(parent.metadata)
+            meta["parent_id"] = parent_id
+            meta["content_hash"] = _sha1(piece.page_content)
+            children.append(Document(page_content=piece.page_content, metadata=meta))
+            ids.append(f"{parent_id}::k{n}")
+
+    return children, ids
+
+
 # -----------------------------
 # Main Ingestion Pipeline
 # -----------------------------
 
-def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
+def _drop_collection(cfg: IngestionConfig, name: str) -> None:
+    try:
+        Chroma(collection_name=name, persist_directory=str(cfg.persist_directory)).delete_collection()
+    except Exception:
+        pass
+
+
+def _staging_name(name: str) -> str:
+    return f"{name}-staging"
+
+
+def _swap_in(cfg: IngestionConfig, staging: Optional[str], live: str) -> None:
+    # Chroma has no atomic swap: retire the live collection, rename staging into place, drop the old one
+    client = chromadb.PersistentClient(path=str(cfg.persist_directory))
+    retired = f"{live}-retired"
+    _drop_collection(cfg, retired)
+    try:
+        client.get_collection(live).modify(name=retired)
+    except Exception:
+        retired = None  # first build: nothing live yet
+
+    try:
+        if staging is not None:
+            client.get_collection(staging).modify(name=live)
+    except Exception:
+        if retired is not None:
+            client.get_collection(retired).modify(name=live)
+        raise
+    if retired is not None:
+        client.delete_collection(retired)
+
+
+def _docstore_staging_path(cfg: IngestionConfig) -> Path:
+    return cfg.docstore_path.with_name(cfg.docstore_path.name + ".staging")
+
+
+def _write_parents(
+    cfg: IngestionConfig,
+    parents: List[Document],
+    parent_ids: List[str],
+    num_shards: int,
+    target_shards: List[int],
+    partial: bool,
+    checkpoint: dict,
+) -> None:
+    """Store the parents of the rebuilt shards; atomic runs write a staging copy that step 5 swaps in."""
+    path = _docstore_staging_path(cfg) if cfg.atomic else cfg.docstore_path
+    fingerprint = _chunk_fingerprint(parents, parent_ids)
+    if checkpoint.get("docstore") == {"path": str(path), "fingerprint": fingerprint} and path.exists():
+        return  # resumed run: this docstore was already written in full
+
+    if cfg.atomic:
+        path.unlink(missing_ok=True)
+        if partial and cfg.docstore_path.exists():
+            # Untouched shards keep their parents: seed staging with a copy of the live store
+            live = ParentDocstore(cfg.docstore_path, read_only=True)
+            try:
+                live.copy_to(path)
+            finally:
+                live.close()
+
+    docstore = ParentDocstore(path)
+    try:
+        docstore.delete_docs(keep=lambda doc_id: shard_for_doc(doc_id, num_shards) not in target_shards)
+        docstore.put_many(zip(parent_ids, parents))
+    finally:
+        docstore.close()
+    checkpoint["docstore"] = {"path": str(path), "fingerprint": fingerprint}
+    _write_checkpoint(cfg, checkpoint)
+
+
+def _chunk_fingerprint(docs: List[Document], ids: List[str]) -> str:
+    # Same ids + same content in the same order => a resume may skip the committed prefix
+    h = hashlib.sha1()
+    for d, chunk_id in zip(docs, ids):
+        h.update(f"{chunk_id}:{d.metadata.get('content_hash', '')}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _checkpoint_path(cfg: IngestionConfig) -> Path:
+    return cfg.checkpoint_path or cfg.manifest_path.with_name(cfg.manifest_path.stem + ".checkpoint.json")
+
+
+def _load_checkpoint(cfg: IngestionConfig) -> dict:
+    try:
+        return json.loads(_checkpoint_path(cfg).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _write_checkpoint(cfg: IngestionConfig, checkpoint: dict) -> None:
+    # Write-then-rename so a crash mid-write never leaves a torn checkpoint
+    path = _checkpoint_path(cfg)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _doc_summaries(page_docs: List[Document], cfg: IngestionConfig) -> Dict[str, Dict[str, Any]]:
+    # Title + first-page text per doc_id (doc_id = sha1(source_path), as in _split_and_tag)
+    firsts: Dict[str, Document] = {}
+    for d in page_docs:
+        doc_id = _sha1(str(d.metadata.get("source_path", d.metadata.get("source", "unknown"))))
+        page = d.metadata.get("page") if d.metadata.get("page") is not None else 0
+        current = firsts.get(doc_id)
+        if current is None or page < (current.metadata.get("page") or 0):
+            firsts[doc_id] = d
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for doc_id, d in firsts.items():
+        source = str(d.metadata.get("source", "unknown"))
+        title = str(d.metadata.get("title") or "").strip() or Path(source).stem
+        out[doc_id] = {
+            "text": f"{title}\n\n{d.page_content[:cfg.doc_summary_chars]}",
+            "metadata": {"doc_id": doc_id, "source": source, "title": title},
+        }
+    return out
+
+
+def _build_doc_index(
+    cfg: IngestionConfig,
+    page_docs: List[Document],
+    chunk_collections: Dict[int, str],
+    num_shards: int,
+    partial: bool,
+) -> int:
+    """Rebuild the document-level index entries of the rebuilt shards; returns the index size.
+
+    Atomic runs build a staging index that step 5 swaps in with the chunk collections. Other runs
+    update the live index in place (upsert, then delete entries that are gone), so retrievers that
+    hold it open keep working.
+    """
+    client = chromadb.PersistentClient(path=str(cfg.persist_directory))
+    live = doc_index_name(cfg.collection_name)
+
+    if cfg.atomic:
+        # A partial rebuild carries over the entries of documents in untouched shards
+        carried = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+        if partial:
+            try:
+                got = client.get_collection(live).get(include=["embeddings", "documents", "metadatas"])
+            except Exception:
+                got = None
+            if got is not None:
+                for i, doc_id in enumerate(got["ids"]):
+                    if shard_for_doc(doc_id, num_shards) not in chunk_collections:
+                        for key in carried:
+                            carried[key].append(doc_id if key == "ids" else got[key][i])
+
+        target = _staging_name(live)
+        _drop_collection(cfg, target)
+        index = client.get_or_create_collection(target)
+        if carried["ids"]:
+            index.upsert(**carried)
+    else:
+        index = client.get_or_create_collection(live)
+    written: set[str] = set()
+
+    summaries = _doc_summaries(page_docs, cfg)
+    by_shard: Dict[int, List[str]] = defaultdict(list)
+    for doc_id in summaries:
+        by_shard[shard_for_doc(doc_id, num_shards)].append(doc_id)
+
+    batch = 64
+    for shard, doc_ids in by_shard.items():
+        try:
+            chunks = client.get_collection(chunk_collections[shard])
+        except Exception:
+            continue
+        for start in range(0, len(doc_ids), batch):
+            wanted = doc_ids[start:start + batch]
+            got = chunks.get(where={"doc_id": {"$in": wanted}}, include=["embeddings", "metadatas"])
+            vectors: Dict[str, List[Any]] = defaultdict(list)
+            versions: Dict[str, List[str]] = defaultdict(list)
+            for chunk_id, vector, md in zip(got["ids"], got["embeddings"], got["metadatas"]):
+                vectors[md["doc_id"]].append(vector)
+                versions[md["doc_id"]].append(f"{chunk_id}:{md.get('content_hash', '')}")
+            if not vectors:
+                continue
+
+            ids, embeddings, documents, metadatas = [], [], [], []
+            for doc_id, vs in vectors.items():
+                centroid = np.mean(np.asarray(vs, dtype=np.float32), axis=0)
+                norm = float(np.linalg.norm(centroid))
+                ids.append(doc_id)
+                embeddings.append((centroid / norm if norm else centroid).tolist())
+                documents.append(summaries[doc_id]["text"])
+                # Changes whenever the document's chunks do; retrievers key their chunk caches by it
+                chunks_hash = _sha1("\n".join(sorted(versions[doc_id])))
+                metadatas.append(summaries[doc_id]["metadata"] | {"chunk_count": len(vs), "chunks_hash": chunks_hash})
+            index.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+            written.update(ids)
+
+    if not cfg.atomic:
+        # Documents of the rebuilt shards that no longer have chunks drop out of the live index
+        existing = index.get(include=[])["ids"]
+        stale = [d for d in existing if shard_for_doc(d, num_shards) in chunk_collections and d not in written]
+        if stale:
+            index.delete(ids=stale)
+    return index.count()
+
+
+def _merge_shard_counts(cfg: IngestionConfig, counts: Dict[str, int]) -> Dict[str, int]:
+    # Partial rebuilds keep the counts recorded for untouched shards
+    try:
+        previous = json.loads(cfg.manifest_path.read_text(encoding="utf-8"))
+    except Exception:
+        return counts
+    if previous.get("num_shards") != cfg.num_shards:
+        return counts
+    merged = dict(previous.get("shard_chunk_counts") or {})
+    merged.update(counts)
+    return merged
+
+
+def ingest(
+    cfg: IngestionConfig = IngestionConfig(),
+    embeddings: Optional[Embeddings] = None,
+    shards: Optional[Sequence[int]] = None,
+    resume: bool = False,
+) -> dict:
+    """Build the vector store; `shards` rebuilds only those shards from scratch, leaving the rest untouched.
+
+    Chunks are upserted in batches with a checkpoint after each one; `resume` continues an interrupted
+    run from its last committed batch.
+    """
     if not cfg.dataset_dir.exists():
         raise FileNotFoundError(f"Dataset folder not found: {cfg.dataset_dir.resolve()}")
 
@@ -245,6 +490,29 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
     if not pdf_files:
         raise FileNotFoundError(f"No PDF files found under: {cfg.dataset_dir.resolve()}")
 
+    num_shards = max(1, cfg.num_shards)
+    target_shards = list(range(num_shards))
+    if shards is not None:
+        target_shards = sorted(set(shards))
+        invalid = [i for i in target_shards if not 0 <= i < num_shards]
+        if invalid:
+            raise ValueError(f"Shard(s) {invalid} out of range for num_shards={num_shards}")
+
+        # Only PDFs that hash into the rebuilt shards need loading (doc_id = sha1(source_path))
+        pdf_files = [p for p in pdf_files if shard_for_doc(_sha1(str(p.as_posix())), num_shards) in target_shards]
+
+    run_key = {
+        "collection_name": cfg.collection_name,
+        "num_shards": num_shards,
+        "shards": target_shards,
+        "atomic": cfg.atomic,
+        "parent_child": cfg.parent_child,
+    }
+    checkpoint = _load_checkpoint(cfg) if resume else {}
+    if checkpoint and checkpoint.get("run") != run_key:
+        raise ValueError(f"Checkpoint {_checkpoint_path(cfg)} belongs to a different run; re-run without --resume")
+    checkpoint = {"run": run_key, "collections": checkpoint.get("collections", {}), "docstore": checkpoint.get("docstore")}
+
     all_docs: List[Document] = []
     failures: List[dict] = []
 
@@ -271,6 +539,8 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
             "chunk_size_tokens": cfg.chunk_size_tokens,
             "chunk_overlap_tokens": cfg.chunk_overlap_tokens,
             "max_chunk_chars": cfg.max_chunk_chars,
+            "num_shards": num_shards,
+            "rebuilt_shards": list(shards) if shards is not None else None,
             "pdf_count": len(pdf_files),
             "page_docs_count": len(all_docs),
             "chunk_count": 0,
@@ -280,21 +550,76 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
         cfg.manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
         return manifest
 
-    # 3) Embed + store in Chroma
-    embeddings = OllamaEmbeddings(model=cfg.embedding_model)
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        ids=ids,
-        collection_name=cfg.collection_name,
-        embedding=embeddings,
-        persist_directory=str(cfg.persist_directory),
-    )
-
-    # Persist (some versions auto-persist; this keeps it explicit)
-    try:
-        vectorstore.persist()
-    except Exception:
-        pass
+    # 2b) Parent-child: parents go to the docstore, only the children are embedded
+    parent_count = len(splits)
+    if cfg.parent_child:
+        _write_parents(cfg, splits, ids, num_shards, target_shards, shards is not None, checkpoint)
+        splits, ids = _split_children(splits, ids, cfg)
+
+    # 3) Route chunks to shards by doc_id hash (a document never spans shards)
+    by_shard: Dict[int, Tuple[List[Document], List[str]]] = {i: ([], []) for i in target_shards}
+    for d, chunk_id in zip(splits, ids):
+        shard = shard_for_doc(d.metadata["doc_id"], num_shards)
+        by_shard[shard][0].append(d)
+        by_shard[shard][1].append(chunk_id)
+
+    # 4) Embed + upsert in committed batches, one collection per shard
+    embeddings = embeddings or OllamaEmbeddings(model=cfg.embedding_model)
+    batch_size = max(1, cfg.upsert_batch_size)
+    shard_counts: Dict[str, int] = {}
+    resumed_chunks = 0
+    for shard, (shard_docs, shard_ids) in by_shard.items():
+        name = shard_collection_name(cfg.collection_name, shard, num_shards)
+        target = _staging_name(name) if cfg.atomic else name
+        shard_counts[name] = len(shard_docs)
+
+        fingerprint = _chunk_fingerprint(shard_docs, shard_ids)
+        progress = checkpoint["collections"].get(target, {})
+        committed = progress.get("committed", 0) if progress.get("fingerprint") == fingerprint else 0
+        resumed_chunks += committed
+
+        # Fresh builds start empty; plain full ingests keep upserting over the existing collection
+        if committed == 0 and (cfg.atomic or shards is not None):
+            _drop_collection(cfg, target)
+
+        vectorstore = Chroma(
+            collection_name=target,
+            embedding_function=embeddings,
+            persist_directory=str(cfg.persist_directory),
+        )
+        for start in range(committed, len(shard_docs), batch_size):
+            end = min(len(shard_docs), start + batch_size)
+            vectorstore.add_documents(shard_docs[start:end], ids=shard_ids[start:end])
+            checkpoint["collections"][target] = {"fingerprint": fingerprint, "committed": end, "total": len(shard_docs)}
+            _write_checkpoint(cfg, checkpoint)
+
+    # 4b) Document-level index for coarse-to-fine retrieval (derived, so always rebuilt)
+    doc_index_count = None
+    if cfg.doc_index:
+        chunk_collections = {
+            shard: (_staging_name(name) if cfg.atomic else name)
+            for shard in by_shard
+            for name in [shard_collection_name(cfg.collection_name, shard, num_shards)]
+        }
+        doc_index_count = _build_doc_index(cfg, all_docs, chunk_collections, num_shards, partial=shards is not None)
+
+    # 5) Atomic mode: only a fully built run replaces the live collections
+    if cfg.atomic:
+        for shard, (shard_docs, _) in by_shard.items():
+            name = shard_collection_name(cfg.collection_name, shard, num_shards)
+            _swap_in(cfg, _staging_name(name) if shard_docs else None, name)
+        if cfg.parent_child:
+            # The children just swapped in must resolve to the parents built with them
+            os.replace(_docstore_staging_path(cfg), cfg.docstore_path)
+        if cfg.doc_index:
+            _swap_in(cfg, _staging_name(doc_index_name(cfg.collection_name)), doc_index_name(cfg.collection_name))
+
+    _checkpoint_path(cfg).unlink(missing_ok=True)
+    # Running apps compare this id on each lookup and reopen their collections / docstore when it moves
+    generation = bump_generation(cfg.persist_directory)
+
+    if shards is not None:
+        shard_counts = _merge_shard_counts(cfg, shard_counts)
 
     manifest = {
         "ingested_at": datetime.utcnow().isoformat() + "Z",
@@ -305,9 +630,21 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
         "chunk_size_tokens": cfg.chunk_size_tokens,
         "chunk_overlap_tokens": cfg.chunk_overlap_tokens,
         "max_chunk_chars": cfg.max_chunk_chars,
+        "num_shards": num_shards,
+        "rebuilt_shards": list(shards) if shards is not None else None,
+        "shard_chunk_counts": shard_counts,
         "pdf_count": len(pdf_files),
         "page_docs_count": len(all_docs),
-        "chunk_count": len(splits),
+        "chunk_count": parent_count,
+        "upsert_batch_size": batch_size,
+        "atomic": cfg.atomic,
+        "generation": generation,
+        "resumed_chunks": resumed_chunks,
+        "doc_index": doc_index_name(cfg.collection_name) if cfg.doc_index else None,
+        "doc_index_count": doc_index_count,
+        "parent_child": cfg.parent_child,
+        "child_chunk_count": len(splits) if cfg.parent_child else None,
+        "docstore_path": str(cfg.docstore_path.resolve()) if cfg.parent_child else None,
         "failures": failures,
     }
 
@@ -316,5 +653,26 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
 
 
 if __name__ == "__main__":
-    result = ingest()
+    parser = argparse.ArgumentParser(description="Build the Chroma vector store from ./Dataset")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("RAG_NUM_SHARDS", "1")),
+                        help="number of collections to split chunks across (env RAG_NUM_SHARDS)")
+    parser.add_argument("--rebuild-shard", type=int, action="append", default=None,
+                        help="rebuild only this shard (repeatable); other shards are left untouched")
+    parser.add_argument("--parent-child", action="store_true",
+                        help="embed small child chunks; store the full chunks as parents for generation")
+    parser.add_argument("--batch-size", type=int, default=IngestionConfig.upsert_batch_size,
+                        help="chunks per committed upsert batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its last committed batch")
+    parser.add_argument("--atomic", action="store_true",
+                        help="build into staging collections and swap them in only when the run succeeds")
+    args = parser.parse_args()
+
+    cfg = IngestionConfig(
+        num_shards=args.shards,
+        parent_child=args.parent_child,
+        upsert_batch_size=args.batch_size,
+        atomic=args.atomic,
+    )
+    result = ingest(cfg, shards=args.rebuild_shard, resume=args.resume)
     print(json.dumps(result, indent=2))
@@ -1,14 +1,319 @@
-from langchain_ollama import OllamaEmbeddings
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_ollama import OllamaEmbeddings
+from pydantic import ConfigDict, Field, PrivateAttr
+
+from docstore import ParentDocstore
+from store_layout import (
+    DOCSTORE_PATH,
+    PERSIST_DIR,
+    doc_index_name,
+    read_generation,
+    shard_collection_name,
+    shard_for_doc,
+)
 
-PERSIST_DIR = "./.chroma"
 COLLECTION = "rag-chroma"
+EMBEDDING_MODEL = "nomic-embed-text:latest"
+TOP_K = 5
+NUM_SHARDS = int(os.getenv("RAG_NUM_SHARDS", "1"))
+DOC_TOP_M = int(os.getenv("RAG_DOC_TOP_M", "0"))  # 0 = search every chunk; >0 = two-stage retrieval
+SEARCH_WORKERS = int(os.getenv("RAG_SEARCH_WORKERS", "8"))
+
+
+# -----------------------------
+# Scatter-gather Retrieval
+# -----------------------------
+
+_search_executor: Optional[ThreadPoolExecutor] = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    # One pool for every retriever, so rebuilding retrievers does not leak threads
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            _search_executor = ThreadPoolExecutor(max_workers=max(1, SEARCH_WORKERS), thread_name_prefix="shard-search")
+        return _search_executor
+
+
+class ShardedRetriever(BaseRetriever):
+    """Scatter-gather retriever: query every shard in parallel, merge per-shard top-k by distance."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    stores: List[Chroma]
+    embeddings: Embeddings
+    k: int = TOP_K
+    executor: Optional[ThreadPoolExecutor] = Field(default=None, exclude=True)  # default: the shared pool
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.executor is None:
+            self.executor = _get_search_executor()
+
+    def search_with_scores(self, query: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        # Embed once, then fan the vector out to every shard
+        return self.search_by_vector_with_scores(self.embeddings.embed_query(query), k)
+
+    def search_by_vector_with_scores(self, vector: List[float], k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        k = k or self.k
+        per_shard = self.executor.map(
+            lambda store: store.similarity_search_by_vector_with_relevance_scores(vector, k=k),
+            self.stores,
+        )
+        merged = [hit for hits in per_shard for hit in hits]
+        merged.sort(key=lambda hit: hit[1])
+        return merged[:k]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query)]
+
+
+class TwoStageRetriever(ShardedRetriever):
+    """Coarse-to-fine: rank documents by centroid in the doc index, then score chunks only inside the top-M.
+
+    Each matched document's chunk embeddings are kept as a small in-memory sub-index (LRU), so the
+    second stage costs O(chunks in the matched documents) no matter how large the corpus grows.
+    """
+
+    doc_store: Chroma
+    top_m: int = 8
+    doc_cache_size: int = 512
+    # Keyed by (doc_id, chunks_hash): a re-ingested document gets a new key, so stale vectors are never scored
+    _cache: "OrderedDict[Tuple[str, str], Tuple[List[str], np.ndarray]]" = PrivateAttr(default_factory=OrderedDict)
+    _cache_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _ranked_documents(self, vector: List[float]) -> List[Tuple[str, str]]:
+        hits = self.doc_store.similarity_search_by_vector_with_relevance_scores(vector, k=self.top_m)
+        return [(doc.metadata.get("doc_id") or doc.id, str(doc.metadata.get("chunks_hash", ""))) for doc, _ in hits]
+
+    def top_documents(self, vector: List[float]) -> List[str]:
+        return [doc_id for doc_id, _ in self._ranked_documents(vector)]
+
+    def _sub_indexes(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[List[str], np.ndarray]]:
+        """Chunk ids + embedding matrix per document; documents with no chunks (e.g. mid-rebuild) are left out."""
+        with self._cache_lock:
+            found = {key: self._cache[key] for key in keys if key in self._cache}
+            for key in found:
+                self._cache.move_to_end(key)
+
+        missing: Dict[int, List[str]] = defaultdict(list)
+        for doc_id, version in keys:
+            if (doc_id, version) not in found:
+                missing[shard_for_doc(doc_id, len(self.stores))].append(doc_id)
+        loaded: Dict[str, Tuple[List[str], List[Any]]] = {}
+        for shard, ids in missing.items():
+            where = {"doc_id": ids[0]} if len(ids) == 1 else {"doc_id": {"$in": ids}}
+            got = self.stores[shard].get(where=where, include=["embeddings", "metadatas"])
+            for chunk_id, vec, md in zip(got["ids"], got["embeddings"], got["metadatas"]):
+                rows = loaded.setdefault(md["doc_id"], ([], []))
+                rows[0].append(chunk_id)
+                rows[1].append(vec)
+
+        with self._cache_lock:
+            for key in keys:
+                if key not in found and key[0] in loaded:
+                    chunk_ids, vecs = loaded[key[0]]
+                    found[key] = (chunk_ids, np.asarray(vecs, dtype=np.float32))
+                    self._cache[key] = found[key]
+            while len(self._cache) > self.doc_cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def search_by_vector_with_scores(self, vector: List[float], k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        k = k or self.k
+        keys = self._ranked_documents(vector)
+        subs = self._sub_indexes(keys)
+        chunk_ids = [c for key in keys if key in subs for c in subs[key][0]]
+        if not chunk_ids:
+            # No doc index hits, or none of them has chunks right now: degrade to the full search
+            return super().search_by_vector_with_scores(vector, k)
+        matrix = np.concatenate([subs[key][1] for key in keys if key in subs])
+        query = np.asarray(vector, dtype=np.float32)
+        # Squared L2, the distance Chroma's default "l2" space reports
+        distances = ((matrix - query) ** 2).sum(axis=1)
+        best = np.argsort(distances, kind="stable")[:k]
+
+        by_shard: Dict[int, List[str]] = defaultdict(list)
+        for i in best:
+            by_shard[shard_for_doc(chunk_ids[i].split("::", 1)[0], len(self.stores))].append(chunk_ids[i])
+        docs = {d.id: d for shard, ids in by_shard.items() for d in self.stores[shard].get_by_ids(ids)}
+        return [(docs[chunk_ids[i]], float(distances[i])) for i in best if chunk_ids[i] in docs]
+
+
+def build_retriever(
+    persist_directory: str = PERSIST_DIR,
+    collection_name: str = COLLECTION,
+    embeddings: Optional[Embeddings] = None,
+    k: int = TOP_K,
+    num_shards: int = NUM_SHARDS,
+    doc_top_m: int = DOC_TOP_M,
+) -> BaseRetriever:
+    embeddings = embeddings or OllamaEmbeddings(model=EMBEDDING_MODEL)
+    stores = [
+        Chroma(
+            collection_name=shard_collection_name(collection_name, i, num_shards),
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+        )
+        for i in range(max(1, num_shards))
+    ]
+
+    if doc_top_m > 0:
+        doc_store = Chroma(
+            collection_name=doc_index_name(collection_name),
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+        )
+        # Stores ingested before the doc index existed fall back to a full chunk search
+        if doc_store.get(limit=1, include=[])["ids"]:
+            return TwoStageRetriever(stores=stores, embeddings=embeddings, k=k, doc_store=doc_store, top_m=doc_top_m)
+
+    if num_shards <= 1:
+        return stores[0].as_retriever(search_kwargs={"k": k})   # This returns k chunks
+    return ShardedRetriever(stores=stores, embeddings=embeddings, k=k)
+
+
+def retriever_embeddings(retriever: BaseRetriever) -> Embeddings:
+    """Embedding model behind a retriever built by build_retriever."""
+    if isinstance(retriever, ShardedRetriever):
+        return retriever.embeddings
+    return retriever.vectorstore.embeddings
+
+
+def search_with_scores(retriever: BaseRetriever, query: str, k: Optional[int] = None) -> List[Tuple[Document, Optional[float]]]:
+    """Top-k with distances (lower is closer); retrievers without scores report None."""
+    if isinstance(retriever, ShardedRetriever):
+        return retriever.search_with_scores(query, k)
+    vectorstore = getattr(retriever, "vectorstore", None)
+    if vectorstore is None:
+        return [(doc, None) for doc in retriever.invoke(query)]
+    k = k or retriever.search_kwargs.get("k", TOP_K)
+    return vectorstore.similarity_search_with_score(query, k=k)
+
+
+def search_by_vector_with_scores(retriever: BaseRetriever, vector: List[float], k: Optional[int] = None) -> List[Tuple[Document, float]]:
+    """Top-k with distances for a pre-computed query embedding (lets callers batch the embedding step)."""
+    if isinstance(retriever, ShardedRetriever):
+        return retriever.search_by_vector_with_scores(vector, k)
+    k = k or retriever.search_kwargs.get("k", TOP_K)
+    return retriever.vectorstore.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+
+
+_retriever: Optional[BaseRetriever] = None
+_retriever_generation: Optional[str] = None  # None: pinned by set_retriever, never rebuilt
+_handles_lock = threading.Lock()
+
+
+def get_retriever() -> BaseRetriever:
+    # Built lazily so importing the graph does not open the vector store; rebuilt after a re-ingest,
+    # whose (atomic) swap may have dropped the collections the old handles point at
+    global _retriever, _retriever_generation
+    with _handles_lock:
+        if _retriever is not None and _retriever_generation is None:
+            return _retriever
+        generation = read_generation(PERSIST_DIR)
+        if _retriever is None or generation != _retriever_generation:
+            _retriever = build_retriever()
+            _retriever_generation = generation
+        return _retriever
+
+
+def set_retriever(retriever: Optional[BaseRetriever]) -> None:
+    """Swap the retriever used by the graph (e.g. a benchmark store); None restores the default."""
+    global _retriever, _retriever_generation
+    with _handles_lock:
+        _retriever = retriever
+        _retriever_generation = None
+
+
+def __getattr__(name: str) -> Any:
+    if name == "retriever":
+        return get_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# -----------------------------
+# Parent Expansion (parent-child chunking)
+# -----------------------------
+
+_docstore: Optional[ParentDocstore] = None
+_docstore_generation: Optional[str] = None  # None: pinned by set_docstore, never reopened
+
+
+def get_docstore() -> Optional[ParentDocstore]:
+    # None when the store was ingested without parent-child chunking; reopened after a re-ingest,
+    # since an atomic run replaces the file this connection still reads
+    global _docstore, _docstore_generation
+    with _handles_lock:
+        if _docstore is not None and _docstore_generation is None:
+            return _docstore
+        generation = read_generation(PERSIST_DIR)
+        if _docstore is None or generation != _docstore_generation:
+            # The old connection is left to in-flight readers and closes when collected
+            _docstore = ParentDocstore(DOCSTORE_PATH, read_only=True) if os.path.exists(DOCSTORE_PATH) else None
+            _docstore_generation = generation
+        return _docstore
+
+
+def set_docstore(docstore: Optional[ParentDocstore]) -> None:
+    global _docstore, _docstore_generation
+    with _handles_lock:
+        _docstore = docstore
+        _docstore_generation = None
+
+
+def expand_to_parents(documents: List[Document]) -> List[Document]:
+    """Swap child chunks for their parent sections, de-duplicated in rank order.
+
+    Documents without a `parent_id` (or whose parent is missing) are passed through unchanged.
+    """
+    parent_ids = [d.metadata.get("parent_id") for d in documents]
+    wanted = list(dict.fromkeys(pid for pid in parent_ids if pid))
+    docstore = get_docstore() if wanted else None
+    if docstore is None:
+        return list(documents)
+
+    parents = docstore.get_many(wanted)
+    out: List[Document] = []
+    seen: set[str] = set()
+    for d, pid in zip(documents, parent_ids):
+        parent = parents.get(pid) if pid else None
+        if parent is None:
+            out.append(d)
+        elif pid not in seen:
+            seen.add(pid)
+            out.append(parent)
+    return out
 
-llm = OllamaEmbeddings(model="nomic-embed-text:latest")
 
-retriever = Chroma(
-    collection_name=COLLECTION,
-    embedding_function=llm,
-    persist_directory=PERSIST_DIR,
-).as_retriever(search_kwargs={"k": 5})   # This returns 5 chunks
+def fetch_chunks(ids: List[str]) -> List[Document]:
+    """Re-read chunks by stable id: the vector store(s) first, then the parent docstore."""
+    retriever = get_retriever()
+    if isinstance(retriever, ShardedRetriever):
+        stores = retriever.stores
+    else:
+        stores = [retriever.vectorstore] if getattr(retriever, "vectorstore", None) is not None else []
 
+    found = {}
+    for store in stores:
+        for d in store.get_by_ids(ids):
+            found[d.id] = d
+    missing = [i for i in ids if i not in found]
+    docstore = get_docstore() if missing else None
+    if docstore is not None:
+        found.update(docstore.get_many(missing))
+    return [found[i] for i in ids if i in found]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+
+PERSIST_DIR = "./.chroma"
+DOCSTORE_PATH = os.getenv("RAG_DOCSTORE_PATH", os.path.join(PERSIST_DIR, "parents.sqlite3"))
+
+
+# -----------------------------
+# Shard Layout (shared by ingestion and retrieval)
+# -----------------------------
+
+def shard_for_doc(doc_id: str, num_shards: int) -> int:
+    # doc_id is a sha1 hex digest, so its prefix is uniformly distributed
+    if num_shards <= 1:
+        return 0
+    return int(doc_id[:8], 16) % num_shards
+
+
+def shard_collection_name(collection_name: str, shard: int, num_shards: int) -> str:
+    # A single shard keeps the historical collection name
+    if num_shards <= 1:
+        return collection_name
+    return f"{collection_name}-s{shard}of{num_shards}"
+
+
+def doc_index_name(collection_name: str) -> str:
+    # One document-level index per chunk collection family (covers every shard)
+    return f"{collection_name}-docs"
+
+
+# -----------------------------
+# Store Generation (lets long-lived readers notice a re-ingest)
+# -----------------------------
+
+GENERATION_FILE = "ingest-generation"
+
+
+def read_generation(persist_directory: str | Path = PERSIST_DIR) -> str:
+    """Id of the last completed ingest into this store ("" before the first one)."""
+    try:
+        return (Path(persist_directory) / GENERATION_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def bump_generation(persist_directory: str | Path = PERSIST_DIR) -> str:
+    # Written aside and renamed, so a reader never sees a half-written id
+    path = Path(persist_directory) / GENERATION_FILE
+    generation = uuid.uuid4().hex
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(generation, encoding="utf-8")
+    os.replace(tmp, path)
+    return generation
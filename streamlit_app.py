@@ -9,10 +9,23 @@ from UI.components import (
     push_assistant_message,
     push_user_message,
     render_chat,
+    render_message,
     safe_extract_generation,
 )
+from graph.tracing import tracer
 
-from graph.graph_flow import app
+
+@st.cache_resource(show_spinner="Loading knowledge base…")
+def load_graph():
+    # Process-wide: compiled graph, vector store and pooled LLM client are built once, not per re-run
+    from graph.config import config
+    from graph.graph_flow import app
+    from graph.llm_gateway import gateway
+    from ingestion_retrival import get_retriever
+
+    get_retriever()
+    gateway.chat_model(config.llm_model)
+    return app
 
 
 st.set_page_config(page_title="AI Finance RAG Assistant", page_icon="💬", layout="centered")
@@ -25,29 +38,28 @@ init_state()
 header()
 st.write("")
 
-render_chat(st.session_state.messages)
+app = load_graph()
+
+render_chat(st.session_state.messages, window=st.session_state.history_window)
 
-user_text = chat_input_box(disabled=st.session_state.busy)
+user_text = chat_input_box()
 
+# Answer inside the submit run itself: render the new turn incrementally, no extra st.rerun()
 if user_text:
-    st.session_state.busy = True
-    st.session_state.pending_user_query = user_text
     push_user_message(user_text)
-    st.rerun()
+    render_message("user", user_text)
 
-pending = st.session_state.pending_user_query
-if pending:
-    with st.spinner("Thinking with retrieval…"):
-        try:
-            answer = app.invoke(input={"question": pending})
-            response_text = safe_extract_generation(answer)
-        except Exception as e:
-            response_text = f"Sorry — I ran into an error while generating a response:\n\n`{e}`"
+    with st.chat_message("assistant"):
+        with st.spinner("Thinking with retrieval…"):
+            try:
+                with tracer.trace("chat", question=user_text):
+                    answer = app.invoke(input={"question": user_text})
+                response_text = safe_extract_generation(answer)
+            except Exception as e:
+                response_text = f"Sorry — I ran into an error while generating a response:\n\n`{e}`"
+        st.markdown(response_text)
 
     push_assistant_message(response_text)
-    st.session_state.pending_user_query = None
-    st.session_state.busy = False
-    st.rerun()
 
 footer_note()
 
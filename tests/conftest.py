@@ -0,0 +1,92 @@
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from langchain_core.retrievers import BaseRetriever
+
+from benchmarks.corpus import SyntheticQuestion, build_corpus
+from benchmarks.fakes import FakeEmbeddings, fake_model_factory
+from docstore import ParentDocstore
+from graph.llm_gateway import gateway, ollama_model_factory
+from ingestion import IngestionConfig, ingest
+from ingestion_retrival import build_retriever, set_docstore, set_retriever
+
+
+# -----------------------------
+# Synthetic Corpus + Fake Backend
+# -----------------------------
+
+@dataclass
+class FakeStore:
+    cfg: IngestionConfig
+    embeddings: FakeEmbeddings
+    questions: List[SyntheticQuestion]
+    root: Path
+    doc_top_m: int = 0
+    manifest: Optional[Dict[str, Any]] = None
+
+    @property
+    def answerable(self) -> List[SyntheticQuestion]:
+        return [q for q in self.questions if q.expect_answer]
+
+    def retriever(self, **kwargs: Any) -> BaseRetriever:
+        kwargs = {"num_shards": self.cfg.num_shards, "doc_top_m": self.doc_top_m} | kwargs
+        return build_retriever(str(self.cfg.persist_directory), self.cfg.collection_name, self.embeddings, **kwargs)
+
+
+def _fake_store(root: Path, opts: Dict[str, Any]) -> FakeStore:
+    """opts: n_docs / pages_per_doc / seed for the corpus, doc_top_m for the retriever, the rest is IngestionConfig."""
+    opts = dict(opts)
+    corpus = {k: opts.pop(k) for k in ("n_docs", "pages_per_doc", "seed") if k in opts}
+    doc_top_m = opts.pop("doc_top_m", 0)
+    questions = build_corpus(root / "Dataset", **({"n_docs": 6, "pages_per_doc": 3} | corpus))
+    cfg = IngestionConfig(
+        **{
+            "dataset_dir": root / "Dataset",
+            "persist_directory": root / ".chroma",
+            "collection_name": "fake-store",
+            "manifest_path": root / "manifest.json",
+            "docstore_path": root / ".chroma" / "parents.sqlite3",
+            "token_counter": "chars",
+        }
+        | opts
+    )
+    return FakeStore(cfg, FakeEmbeddings(), questions, root, doc_top_m=doc_top_m)
+
+
+@pytest.fixture(scope="module")
+def fake_store(request, tmp_path_factory) -> FakeStore:
+    """Synthetic corpus ingested once per module; parametrize indirectly with a dict of options."""
+    store = _fake_store(tmp_path_factory.mktemp("fake-store"), getattr(request, "param", {}))
+    store.manifest = ingest(store.cfg, embeddings=store.embeddings)
+    return store
+
+
+@pytest.fixture
+def fake_corpus(request, tmp_path) -> FakeStore:
+    """Fresh, not yet ingested corpus for tests that drive ingest() themselves."""
+    return _fake_store(tmp_path, getattr(request, "param", {}))
+
+
+@pytest.fixture
+def fake_graph(fake_store) -> Iterator[FakeStore]:
+    """Point the graph at fake_store (retriever, parent docstore) and the fake chat models.
+
+    Every global is restored independently, so one failing restore cannot leak into later tests.
+    """
+    with ExitStack() as restore:
+        gateway.set_model_factory(fake_model_factory())
+        restore.callback(gateway.set_model_factory, ollama_model_factory)
+
+        set_retriever(fake_store.retriever())
+        restore.callback(set_retriever, None)
+
+        if fake_store.cfg.parent_child:
+            docstore = ParentDocstore(fake_store.cfg.docstore_path, read_only=True)
+            restore.callback(docstore.close)
+            set_docstore(docstore)
+            restore.callback(set_docstore, None)
+
+        yield fake_store
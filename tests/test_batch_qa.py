@@ -0,0 +1,81 @@
+import json
+import threading
+
+import pytest
+
+from batch_qa import BatchConfig, BatchRunner, run_batch
+from graph.config import config
+from graph.llm_gateway import gateway
+
+pytestmark = pytest.mark.parametrize("fake_store", [{"collection_name": "batch-test"}], indirect=True)
+
+
+def test_batch_answers_stream_and_resume(tmp_path, fake_graph) -> None:
+    questions = fake_graph.questions
+    qfile = tmp_path / "questions.jsonl"
+    qfile.write_text("\n".join(json.dumps({"id": f"q{i}", "question": q.question}) for i, q in enumerate(questions)))
+    out = tmp_path / "answers.jsonl"
+
+    limits = gateway.limits(config.llm_model)
+    first = run_batch(qfile, out, BatchConfig(concurrency=limits.max_concurrency + 1, window_size=3), limit=4)
+    assert first["answered"] == 4 and first["errors"] == 0
+    assert [w["questions"] for w in first["windows"]] == [3, 1] and all(w["grade_s"] > 0 for w in first["windows"])
+    assert first["llm_gateway"][config.llm_model]["requests"] > 0
+    # The batch's wider concurrency cap is scoped to the run
+    assert gateway.limits(config.llm_model) == limits
+
+    second = run_batch(qfile, out, BatchConfig(concurrency=3, window_size=3))
+    assert second["skipped_already_done"] == 4
+    assert second["answered"] == len(questions) - 4
+
+    records = {r["id"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert len(records) == len(questions)
+
+    answered = records["q0"]
+    assert answered["citations"] and answered["citations"][0]["source"] == "report_0000.pdf"
+    assert set(answered["timings"]) == {"retrieve_s", "generate_s", "latency_s"}
+
+    off_topic = records[f"q{len(questions) - 1}"]
+    assert off_topic["relevant_chunks"] == 0 and off_topic["citations"] == []
+
+
+def test_failed_questions_are_retried_on_resume(tmp_path, fake_graph) -> None:
+    questions = fake_graph.questions[:3]
+    qfile = tmp_path / "questions.jsonl"
+    qfile.write_text("\n".join(json.dumps({"id": f"q{i}", "question": q.question}) for i, q in enumerate(questions)))
+    out = tmp_path / "answers.jsonl"
+    out.write_text(json.dumps({"id": "q0", "question": questions[0].question, "error": "GatewayTimeout()"}) + "\n")
+
+    summary = run_batch(qfile, out, BatchConfig(concurrency=2, window_size=2))
+    assert summary["skipped_already_done"] == 0 and summary["retried_failed"] == 1
+    assert summary["answered"] == 3 and summary["errors"] == 0
+
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert sorted(r["id"] for r in records) == ["q0", "q1", "q2"]
+    assert not any("error" in r for r in records)
+
+
+def test_next_window_is_prepared_while_answering(tmp_path, fake_graph, monkeypatch) -> None:
+    questions = fake_graph.questions[:4]
+    qfile = tmp_path / "questions.jsonl"
+    qfile.write_text("\n".join(json.dumps({"id": f"q{i}", "question": q.question}) for i, q in enumerate(questions)))
+
+    # q0's answer only completes once the second window is being prepared: a stage barrier would time out
+    second_window = threading.Event()
+    prepare, answer = BatchRunner._prepare, BatchRunner._answer
+
+    def prepare_spy(self, window):
+        if window[0].qid == "q2":
+            second_window.set()
+        return prepare(self, window)
+
+    def answer_spy(self, q):
+        if q.qid == "q0" and not second_window.wait(timeout=5):
+            raise TimeoutError("window 2 was not prepared while window 1 was answering")
+        return answer(self, q)
+
+    monkeypatch.setattr(BatchRunner, "_prepare", prepare_spy)
+    monkeypatch.setattr(BatchRunner, "_answer", answer_spy)
+    summary = run_batch(qfile, tmp_path / "answers.jsonl", BatchConfig(concurrency=2, window_size=2))
+    assert summary["answered"] == 4 and summary["errors"] == 0
+    assert [w["questions"] for w in summary["windows"]] == [2, 2]
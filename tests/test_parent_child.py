@@ -0,0 +1,36 @@
+import importlib
+
+import pytest
+
+from ingestion_retrival import expand_to_parents
+
+generate_node = importlib.import_module("graph.nodes.generate_node").generate_node
+
+pytestmark = pytest.mark.parametrize(
+    "fake_store",
+    [{"n_docs": 4, "seed": 5, "collection_name": "parent-child", "parent_child": True,
+      "child_chunk_size_tokens": 40, "child_chunk_overlap_tokens": 5}],
+    indirect=True,
+)
+
+
+def test_children_are_embedded_and_parents_expand_with_pages(fake_graph) -> None:
+    cfg, manifest, retriever, questions = fake_graph.cfg, fake_graph.manifest, fake_graph.retriever(), fake_graph.questions
+    assert manifest["child_chunk_count"] > manifest["chunk_count"] > 0
+
+    children = retriever.invoke(questions[0].question)
+    assert children and all(len(c.page_content) <= cfg.max_child_chunk_chars for c in children)
+    assert all(c.id == f"{c.metadata['parent_id']}::k{c.id.rsplit('::k', 1)[1]}" for c in children)
+
+    parents = expand_to_parents(children)
+    assert [p.id for p in parents] == list(dict.fromkeys(c.metadata["parent_id"] for c in children))
+    for child in children:
+        parent = next(p for p in parents if p.id == child.metadata["parent_id"])
+        assert child.page_content in parent.page_content
+        assert parent.metadata["page_start"] == child.metadata["page_start"]
+
+    # Generation sees parents, and the sources block cites the parent's page
+    out = generate_node({"question": questions[0].question, "documents": children})
+    assert [d.id for d in out["documents"]] == [p.id for p in parents]
+    md = parents[0].metadata
+    assert f"**[1]** {md['source']} (page {md['page_start']})" in out["generation"]
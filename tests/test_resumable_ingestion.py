@@ -0,0 +1,115 @@
+from dataclasses import replace
+
+import chromadb
+import pytest
+from langchain_chroma import Chroma
+
+from benchmarks.fakes import FakeEmbeddings
+from ingestion import IngestionConfig, ingest
+
+
+class CrashingEmbeddings(FakeEmbeddings):
+    """Fails on the n-th embed_documents call, like an embedding server dying mid-run."""
+
+    def __init__(self, crash_on_call: int = 0) -> None:
+        super().__init__()
+        self.crash_on_call = crash_on_call
+        self.embedded = 0
+        self.batches = 0
+
+    def embed_documents(self, texts):
+        self.batches += 1
+        if self.batches == self.crash_on_call:
+            raise ConnectionError("embedding server went away")
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+pytestmark = pytest.mark.parametrize(
+    "fake_corpus", [{"n_docs": 6, "seed": 11, "collection_name": "resume-test", "upsert_batch_size": 4}], indirect=True
+)
+
+
+@pytest.fixture
+def cfg(fake_corpus):
+    return fake_corpus.cfg
+
+
+def _count(cfg: IngestionConfig, name: str) -> int:
+    return len(Chroma(collection_name=name, persist_directory=str(cfg.persist_directory)).get(include=[])["ids"])
+
+
+def test_resume_continues_from_last_committed_batch(cfg) -> None:
+    with pytest.raises(ConnectionError):
+        ingest(cfg, embeddings=CrashingEmbeddings(crash_on_call=3))
+    checkpoint = cfg.manifest_path.with_name("manifest.checkpoint.json")
+    assert checkpoint.exists() and not cfg.manifest_path.exists()
+    assert _count(cfg, cfg.collection_name) == 8
+
+    embeddings = CrashingEmbeddings()
+    manifest = ingest(cfg, embeddings=embeddings, resume=True)
+    assert manifest["resumed_chunks"] == 8
+    assert embeddings.embedded == manifest["chunk_count"] - 8
+    assert _count(cfg, cfg.collection_name) == manifest["chunk_count"]
+    assert not checkpoint.exists()
+
+
+def test_atomic_rebuild_keeps_live_collection_until_success(cfg) -> None:
+    cfg = replace(cfg, atomic=True)
+    total = ingest(cfg, embeddings=FakeEmbeddings())["chunk_count"]
+    assert _count(cfg, cfg.collection_name) == total
+
+    with pytest.raises(ConnectionError):
+        ingest(cfg, embeddings=CrashingEmbeddings(crash_on_call=2))
+    assert _count(cfg, cfg.collection_name) == total  # readers never see a half-built store
+    assert _count(cfg, "resume-test-staging") == 4
+
+    manifest = ingest(cfg, embeddings=FakeEmbeddings(), resume=True)
+    assert manifest["resumed_chunks"] == 4
+    assert _count(cfg, cfg.collection_name) == total
+    client = chromadb.PersistentClient(path=str(cfg.persist_directory))
+    assert {c.name for c in client.list_collections()} == {"resume-test", "resume-test-docs"}
+
+
+def test_atomic_parent_child_stages_the_docstore(cfg) -> None:
+    cfg = replace(cfg, atomic=True, parent_child=True, child_chunk_size_tokens=40, child_chunk_overlap_tokens=5)
+    staging = cfg.docstore_path.with_name(cfg.docstore_path.name + ".staging")
+    ingest(cfg, embeddings=FakeEmbeddings())
+    live_inode = cfg.docstore_path.stat().st_ino
+    assert not staging.exists()
+
+    with pytest.raises(ConnectionError):
+        ingest(cfg, embeddings=CrashingEmbeddings(crash_on_call=2))
+    # The failed run wrote its parents aside; live children still resolve to the live parents
+    assert cfg.docstore_path.stat().st_ino == live_inode
+    staged_inode = staging.stat().st_ino
+
+    ingest(cfg, embeddings=FakeEmbeddings(), resume=True)
+    assert not staging.exists()
+    assert cfg.docstore_path.stat().st_ino == staged_inode  # resumed without rewriting, then swapped in
+
+
+def test_running_readers_follow_an_atomic_swap(fake_corpus, monkeypatch) -> None:
+    import ingestion_retrival as retrieval
+
+    cfg = replace(fake_corpus.cfg, atomic=True, parent_child=True, child_chunk_size_tokens=40, child_chunk_overlap_tokens=5)
+    embeddings, question = FakeEmbeddings(), fake_corpus.answerable[0].question
+    ingest(cfg, embeddings=embeddings)
+
+    # Point the process-wide handles at this store; monkeypatch restores them afterwards
+    build = retrieval.build_retriever
+    monkeypatch.setattr(retrieval, "build_retriever", lambda: build(str(cfg.persist_directory), cfg.collection_name, embeddings))
+    monkeypatch.setattr(retrieval, "PERSIST_DIR", str(cfg.persist_directory))
+    monkeypatch.setattr(retrieval, "DOCSTORE_PATH", str(cfg.docstore_path))
+    for name in ("_retriever", "_retriever_generation", "_docstore", "_docstore_generation"):
+        monkeypatch.setattr(retrieval, name, None)
+
+    retriever, docstore = retrieval.get_retriever(), retrieval.get_docstore()
+    assert retrieval.get_retriever() is retriever and retrieval.get_docstore() is docstore
+
+    # The swap drops the collections the old handles point at; the next lookup reopens them
+    generation = ingest(cfg, embeddings=embeddings)["generation"]
+    fresh = retrieval.get_retriever()
+    assert fresh is not retriever and retrieval._retriever_generation == generation
+    assert fresh.invoke(question)
+    assert retrieval.get_docstore() is not docstore and len(retrieval.get_docstore()) > 0
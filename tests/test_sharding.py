@@ -0,0 +1,69 @@
+from dataclasses import replace
+
+import pytest
+from langchain_chroma import Chroma
+
+from ingestion import IngestionConfig, ingest
+from ingestion_retrival import ShardedRetriever
+from store_layout import shard_collection_name, shard_for_doc
+
+pytestmark = pytest.mark.parametrize(
+    "fake_store", [{"n_docs": 12, "seed": 3, "collection_name": "shard-test"}], indirect=True
+)
+
+
+@pytest.fixture(scope="module")
+def corpus(fake_store):
+    # The same corpus, ingested flat (by fake_store) and as 3 shards
+    ingest(replace(fake_store.cfg, num_shards=3), embeddings=fake_store.embeddings)
+    return fake_store
+
+
+def _shard_ids(cfg: IngestionConfig, num_shards: int) -> list:
+    # Fresh handles each time: a rebuilt shard is a new collection
+    return [
+        set(
+            Chroma(
+                collection_name=shard_collection_name(cfg.collection_name, i, num_shards),
+                persist_directory=str(cfg.persist_directory),
+            ).get(include=[])["ids"]
+        )
+        for i in range(num_shards)
+    ]
+
+
+def test_sharded_retrieval_matches_unsharded(corpus) -> None:
+    embeddings = corpus.embeddings
+    flat = corpus.retriever(num_shards=1)
+    sharded = corpus.retriever(num_shards=3)
+    assert isinstance(sharded, ShardedRetriever)
+
+    store = flat.vectorstore
+    for q in (sq.question for sq in corpus.questions):
+        expected = store.similarity_search_by_vector_with_relevance_scores(embeddings.embed_query(q), k=5)
+        got = sharded.search_with_scores(q)
+        assert [round(score, 6) for _, score in got] == [round(score, 6) for _, score in expected]
+
+        # Equal-distance ties may be ordered differently; everything strictly better must match exactly
+        cutoff = expected[-1][1]
+        assert [d.id for d, score in got if score < cutoff] == [d.id for d, score in expected if score < cutoff]
+        assert [d.id for d in sharded.invoke(q)] == [d.id for d, _ in got]
+
+
+def test_rebuilding_one_shard_leaves_others_untouched(corpus) -> None:
+    cfg = replace(corpus.cfg, num_shards=3)
+    before = _shard_ids(cfg, 3)
+
+    # doc_id hashes the absolute source path (tmp dir included), so derive the layout rather than assume it
+    flat = corpus.retriever(num_shards=1).vectorstore.get(include=["metadatas"])
+    expected = [set() for _ in range(3)]
+    for chunk_id, md in zip(flat["ids"], flat["metadatas"]):
+        expected[shard_for_doc(md["doc_id"], 3)].add(chunk_id)
+    assert before == expected
+
+    rebuilt = shard_for_doc(flat["metadatas"][0]["doc_id"], 3)  # a shard that holds documents
+    manifest = ingest(cfg, embeddings=corpus.embeddings, shards=[rebuilt])
+
+    assert manifest["rebuilt_shards"] == [rebuilt]
+    assert _shard_ids(cfg, 3) == before
+    assert sum(manifest["shard_chunk_counts"].values()) == sum(len(ids) for ids in before)
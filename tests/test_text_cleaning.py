@@ -0,0 +1,37 @@
+import random
+
+from benchmarks.cleaning import legacy_clean_pages, legacy_normalize_text, ocr_document
+import text_cleaning
+from text_cleaning import clean_pages, clear_normalize_cache, normalize_text
+
+ALPHABET = ["a", "b", "x", "-", "-", "\n", "\n", " ", " ", "\t", "\u00ad", "é", "1"]
+
+
+def test_normalize_matches_legacy_substitutions() -> None:
+    rng = random.Random(3)
+    cases = ["x-\ny-\nz", "a-\n\nb", "a \t\n\n\n  b", "  lead\t\ttrail  ", "é-\né", "1-\n-\n2"]
+    cases += ["".join(rng.choices(ALPHABET, k=rng.randint(0, 40))) for _ in range(5000)]
+    for text in cases:
+        assert normalize_text(text) == legacy_normalize_text(text), repr(text)
+
+
+def test_clean_pages_matches_legacy() -> None:
+    rng = random.Random(5)
+    for doc_no in range(6):
+        pages = ocr_document(rng, rng.randint(1, 8), doc_no)
+        for window in (0, 3):
+            assert clean_pages(pages, window, 8, 0.6) == legacy_clean_pages(pages, window, 8, 0.6)
+
+
+def test_normalize_cache_is_bounded_and_keeps_only_cleaned_text(monkeypatch) -> None:
+    monkeypatch.setattr(text_cleaning, "NORMALIZE_CACHE_SIZE", 2)
+    clear_normalize_cache()
+    pages = [f"page {i}  text-\nwrap " * 50 for i in range(3)]
+    cleaned = [normalize_text(p) for p in pages]
+
+    cache = text_cleaning._normalize_cache
+    assert len(cache) == 2 and all(len(key) == 20 for key in cache)  # sha1 digests, not page text
+    assert list(cache.values()) == cleaned[1:]
+    assert normalize_text(pages[2]) is cleaned[2]
+    clear_normalize_cache()
+    assert not cache
@@ -0,0 +1,103 @@
+import pytest
+from langchain_chroma import Chroma
+
+from ingestion import ingest
+from ingestion_retrival import TwoStageRetriever, build_retriever
+from store_layout import doc_index_name, shard_for_doc
+
+pytestmark = pytest.mark.parametrize(
+    "fake_store",
+    [{"n_docs": 10, "seed": 9, "collection_name": "two-stage", "num_shards": 2, "doc_top_m": 2}],
+    indirect=True,
+)
+
+
+def test_doc_index_has_one_entry_per_document(fake_store) -> None:
+    cfg, manifest = fake_store.cfg, fake_store.manifest
+    assert manifest["doc_index_count"] == manifest["pdf_count"] == 10
+
+    index = Chroma(collection_name=doc_index_name(cfg.collection_name), persist_directory=str(cfg.persist_directory))
+    got = index.get(include=["documents", "metadatas"])
+    assert sorted(got["ids"]) == sorted(md["doc_id"] for md in got["metadatas"])
+    md, text = got["metadatas"][0], got["documents"][0]
+    assert text.startswith(md["title"]) and md["chunk_count"] > 0
+
+
+def test_chunk_search_is_confined_to_top_documents(fake_store) -> None:
+    cfg, embeddings, questions = fake_store.cfg, fake_store.embeddings, fake_store.answerable
+    retriever = fake_store.retriever()
+    assert isinstance(retriever, TwoStageRetriever)
+
+    for sq in questions:
+        top_docs = retriever.top_documents(embeddings.embed_query(sq.question))
+        hits = retriever.invoke(sq.question)
+        assert hits and {d.metadata["doc_id"] for d in hits} <= set(top_docs)
+    assert sum(retriever.invoke(sq.question)[0].metadata["source"] == sq.doc_name for sq in questions) >= len(questions) - 1
+
+    # A shard rebuild keeps the index entries of documents in the other shard
+    shard = shard_for_doc(top_docs[0], cfg.num_shards)  # one that holds documents, whatever the tmp path
+    manifest = ingest(cfg, embeddings=embeddings, shards=[shard])
+    assert manifest["doc_index_count"] == 10
+
+    # Without a doc index the retriever falls back to a full search
+    flat = build_retriever(str(cfg.persist_directory), "missing-index", embeddings, num_shards=1, doc_top_m=2)
+    assert not isinstance(flat, TwoStageRetriever)
+
+
+def test_documents_without_chunks_are_skipped(fake_store, monkeypatch) -> None:
+    embeddings, sq = fake_store.embeddings, fake_store.answerable[0]
+    retriever = fake_store.retriever()
+    vector = embeddings.embed_query(sq.question)
+    ranked = retriever._ranked_documents(vector)
+
+    # A doc index entry whose chunks are gone (e.g. mid-rebuild) is ignored rather than crashing the search
+    monkeypatch.setattr(TwoStageRetriever, "_ranked_documents", lambda self, v: [("0" * 40, "")] + ranked)
+    assert {d.metadata["doc_id"] for d in retriever.invoke(sq.question)} <= {doc_id for doc_id, _ in ranked}
+
+    # With no usable document at all it degrades to the full sharded search
+    monkeypatch.setattr(TwoStageRetriever, "_ranked_documents", lambda self, v: [("0" * 40, "")])
+    full = super(TwoStageRetriever, retriever).search_by_vector_with_scores(vector)
+    assert [d.id for d, _ in retriever.search_by_vector_with_scores(vector)] == [d.id for d, _ in full]
+
+
+def test_sub_index_cache_is_keyed_by_chunks_hash(fake_store, monkeypatch) -> None:
+    retriever = fake_store.retriever()
+    vector = fake_store.embeddings.embed_query(fake_store.answerable[0].question)
+    ranked = retriever._ranked_documents(vector)
+    assert all(version for _, version in ranked)
+
+    retriever.search_by_vector_with_scores(vector)
+    assert set(retriever._cache) == set(ranked)
+
+    # A re-ingested document carries a new chunks_hash, so its cached vectors are not reused
+    doc_id, _ = ranked[0]
+    monkeypatch.setattr(TwoStageRetriever, "_ranked_documents", lambda self, v: [(doc_id, "re-ingested")])
+    retriever.search_by_vector_with_scores(vector)
+    assert (doc_id, "re-ingested") in retriever._cache
+
+
+def test_rebuild_updates_the_live_doc_index_in_place(fake_store, monkeypatch) -> None:
+    import ingestion
+
+    cfg, sq = fake_store.cfg, fake_store.answerable[0]
+    assert not cfg.atomic
+    retriever = fake_store.retriever()
+    before = [d.id for d in retriever.invoke(sq.question)]
+    live_id = retriever.doc_store._collection.id
+
+    # A retriever opened before the re-ingest keeps using the same (updated) doc index
+    manifest = ingest(cfg, embeddings=fake_store.embeddings)
+    assert manifest["doc_index_count"] == 10
+    assert retriever.doc_store._collection.id == live_id
+    assert [d.id for d in retriever.invoke(sq.question)] == before
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("summaries failed")
+
+    # A shard rebuild that fails part-way leaves every live entry in place
+    index = Chroma(collection_name=doc_index_name(cfg.collection_name), persist_directory=str(cfg.persist_directory))
+    shard = shard_for_doc(index.get(limit=1, include=[])["ids"][0], cfg.num_shards)
+    monkeypatch.setattr(ingestion, "_doc_summaries", boom)
+    with pytest.raises(RuntimeError):
+        ingest(cfg, embeddings=fake_store.embeddings, shards=[shard])
+    assert len(index.get(include=[])["ids"]) == 10
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import FrozenSet, List, Sequence
+
+
+# -----------------------------
+# Single-pass Normalization
+# -----------------------------
+
+SOFT_HYPHEN = "\u00ad"
+
+# One alternation replaces the four sequential substitutions. Every branch starts on "-", "\n",
+# " " or "\t", so the scanner skips ordinary text instead of trying a match at each word char:
+#   1) "inter-\nnational" -> "international"
+#   2) a blank-line run holding k newlines -> "\n" * min(k, 2)
+#   3) spaces/tabs ending a line (plus any blank lines after) -> "\n" * min(k, 2); otherwise 2+ -> " "
+_NORMALIZE_RE = re.compile(
+    r"-\n(?<=\w-\n)(?=\w)"
+    r"|\n(?:[ \t]*\n)+"
+    r"|[ \t](?:[ \t]*\n(?:[ \t]*\n)*|[ \t]+)"
+)
+
+
+def _normalize_page(text: str) -> str:
+    last_join = -3
+
+    def repl(m: re.Match) -> str:
+        nonlocal last_join
+        s = m.group()
+        if s[0] == "-":
+            # The legacy "(\w)-\n(\w)" consumed the next word char, so "x-\ny-\nz" only joins once
+            if m.start() == last_join + 3:
+                return s
+            last_join = m.start()
+            return ""
+        if "\n" in s:
+            return "\n" if s.count("\n") == 1 else "\n\n"
+        return " "
+
+    return _NORMALIZE_RE.sub(repl, text)
+
+
+# Keyed by the page's sha1 digest and holding only the cleaned text, so the cache never pins raw pages
+NORMALIZE_CACHE_SIZE = 8192
+_normalize_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_normalize_lock = threading.Lock()
+
+
+def clear_normalize_cache() -> None:
+    with _normalize_lock:
+        _normalize_cache.clear()
+
+
+def normalize_text(text: str) -> str:
+    """Clean one page; cached by page digest, so repeated/identical pages are normalized once."""
+    key = hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest()
+    with _normalize_lock:
+        cleaned = _normalize_cache.get(key)
+        if cleaned is not None:
+            _normalize_cache.move_to_end(key)
+            return cleaned
+
+    if SOFT_HYPHEN in text:
+        text = text.replace(SOFT_HYPHEN, "")
+    cleaned = _normalize_page(text).strip()
+
+    with _normalize_lock:
+        _normalize_cache[key] = cleaned
+        while len(_normalize_cache) > NORMALIZE_CACHE_SIZE:
+            _normalize_cache.popitem(last=False)
+    return cleaned
+
+
+# -----------------------------
+# Header/Footer Detection (one sweep per document)
+# -----------------------------
+
+def find_repeated_lines(
+    page_lines: Sequence[List[str]], window: int, min_len: int, ratio: float
+) -> FrozenSet[str]:
+    """Lines seen in the head/tail window of enough pages (a line in both windows counts twice)."""
+    counts: Counter = Counter()
+    for lines in page_lines:
+        # Only the window lines are stripped; the rest of the page is never touched here
+        for ln in lines[:window]:
+            s = ln.strip()
+            if len(s) >= min_len:
+                counts[s] += 1
+        for ln in lines[-window:]:
+            s = ln.strip()
+            if len(s) >= min_len:
+                counts[s] += 1
+
+    threshold = max(2, int(len(page_lines) * ratio))
+    return frozenset(ln for ln, c in counts.items() if c >= threshold)
+
+
+def strip_repeated_lines(text: str, lines: List[str], repeated: FrozenSet[str]) -> str:
+    # Pages that contain none of the repeated lines only need the splitlines/join round trip
+    if not any(r and r in text for r in repeated):
+        return "\n".join(lines)
+    return "\n".join([ln for ln in lines if not ((s := ln.strip()) and s in repeated)])
+
+
+def clean_pages(
+    pages: Sequence[str], window: int, min_len: int, ratio: float, min_pages: int = 3
+) -> List[str]:
+    """Header/footer removal across a document's pages, then per-page normalization."""
+    if len(pages) < min_pages:
+        return [normalize_text(t) for t in pages]
+
+    page_lines = [t.splitlines() for t in pages]
+    repeated = find_repeated_lines(page_lines, window, min_len, ratio)
+    if not repeated:
+        return [normalize_text(t) for t in pages]
+    return [normalize_text(strip_repeated_lines(t, lines, repeated)) for t, lines in zip(pages, page_lines)]